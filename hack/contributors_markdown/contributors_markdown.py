@@ -4,6 +4,7 @@ Generate a Markdown grid of contributor avatars for a GitHub repository.
 
 Usage:
     python generate_contributors_grid.py --repo owner/name --token GH_TOKEN [--cols 7] [--image_size 80] [--output FILE]
+                                         [--api-url URL] [--cache-dir DIR | --no-cache] [--workers 8]
 
 Arguments:
   --repo         GitHub repository in "owner/name" form (e.g. "octocat/Hello-World")
@@ -12,6 +13,13 @@ Arguments:
   --cols         Number of avatars per row in the generated grid (default 7).
   --image_size   Pixel width for avatars (GitHub automatically resizes; default 80).
   --output       File to write the Markdown grid into (default: stdout, use '-' for stdout).
+  --api-url      Base URL of the GitHub REST API (default https://api.github.com), e.g. a
+                 local stand-in for testing.
+  --cache-dir    Where ETags and page bodies are cached between runs, so unchanged pages
+                 come back as 304s (default ~/.cache/contributors_markdown). Entries are
+                 kept per token, so one token's results are never served to another.
+  --no-cache     Don't read or write the ETag cache.
+  --workers      Pages fetched concurrently once the page count is known (default 8).
 
 The generated file contains a Markdown table‑less grid of linked avatars that can
 be embedded in README.md or any other Markdown document.
@@ -19,35 +27,149 @@ be embedded in README.md or any other Markdown document.
 
 from __future__ import annotations
 import argparse
+import hashlib
+import json
 import os
 import sys
+import tempfile
 import textwrap
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 
-API_URL_TEMPLATE = "https://api.github.com/repos/{owner}/{repo}/contributors"
+API_URL = "https://api.github.com"
+API_PATH_TEMPLATE = "/repos/{owner}/{repo}/contributors"
+DEFAULT_CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "contributors_markdown")
 
 
-def fetch_contributors(owner: str, repo: str, token: str | None, per_page: int = 100) -> List[Dict]:
-    """Return a list of contributor objects from the GitHub REST API."""
-    headers = {"Accept": "application/vnd.github+json"}
+def auth_fingerprint(token: str | None) -> str:
+    """A stable, non-reversible id for the credentials a request was made with."""
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class ETagCache:
+    """On-disk cache of page bodies keyed by URL and auth, revalidated with If-None-Match.
+
+    GitHub answers an unchanged page with an empty 304, which doesn't count
+    against the rate limit, and we serve the body we stored last time. What a
+    page contains depends on the token's access, so entries are kept apart
+    per `auth` (see auth_fingerprint).
+    """
+
+    def __init__(self, directory: str, auth: str = "anonymous") -> None:
+        self.directory = directory
+        self.auth = auth
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = f"{self.auth}\0{url}"
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(url), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, etag: str, body: List[Dict], last_page: Optional[int]) -> None:
+        entry = {"url": url, "etag": etag, "body": body, "last_page": last_page}
+        # write to a temp file and rename, so concurrent page fetches and
+        # interrupted runs never leave a half-written entry behind
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp_path, self._path(url))
+
+
+def make_session(token: str | None, pool_size: int = 8) -> requests.Session:
+    """A keep-alive session sized so every concurrent page fetch gets a pooled connection."""
+    session = requests.Session()
+    session.headers["Accept"] = "application/vnd.github+json"
     if token:
-        headers["Authorization"] = f"Bearer {token}"
-
-    contributors: List[Dict] = []
-    page = 1
-    while True:
-        url = f"{API_URL_TEMPLATE.format(owner=owner, repo=repo)}?per_page={per_page}&page={page}"
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        batch = response.json()
-        if not batch:
-            break
-        contributors.extend(batch)
-        if len(batch) < per_page:
-            break
-        page += 1
+        session.headers["Authorization"] = f"Bearer {token}"
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _last_page(response: requests.Response) -> Optional[int]:
+    """Page count from the Link header's rel="last" URL, if there is one."""
+    last = response.links.get("last")
+    if not last:
+        return None
+    pages = parse_qs(urlparse(last["url"]).query).get("page")
+    return int(pages[0]) if pages else None
+
+
+def fetch_page(
+    session: requests.Session, url: str, cache: ETagCache | None = None
+) -> Tuple[List[Dict], Optional[int]]:
+    """Return (contributors on this page, last page number from the Link header)."""
+    cached = cache.get(url) if cache else None
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    response = session.get(url, headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        return cached["body"], _last_page(response) or cached.get("last_page")
+    response.raise_for_status()
+    body = response.json()
+    last_page = _last_page(response)
+    etag = response.headers.get("ETag")
+    if cache and etag:
+        cache.put(url, etag, body, last_page)
+    return body, last_page
+
+
+def fetch_contributors(
+    owner: str,
+    repo: str,
+    token: str | None,
+    per_page: int = 100,
+    api_url: str = API_URL,
+    cache_dir: str | None = None,
+    workers: int = 8,
+) -> List[Dict]:
+    """Return a list of contributor objects from the GitHub REST API.
+
+    The first page's Link header tells us how many pages there are; the rest
+    are then fetched concurrently over one pooled session. If the server sends
+    no Link header, pages are walked one at a time until a short page.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    base = api_url.rstrip("/") + API_PATH_TEMPLATE.format(owner=owner, repo=repo)
+    cache = ETagCache(cache_dir, auth_fingerprint(token)) if cache_dir else None
+
+    def page_url(page: int) -> str:
+        return f"{base}?per_page={per_page}&page={page}"
+
+    with make_session(token, pool_size=workers) as session:
+        contributors, last_page = fetch_page(session, page_url(1), cache)
+        if not contributors or len(contributors) < per_page:
+            return contributors
+
+        if last_page:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pages = pool.map(lambda page: fetch_page(session, page_url(page), cache)[0], range(2, last_page + 1))
+                for batch in pages:
+                    contributors.extend(batch)
+            return contributors
+
+        page = 2
+        while True:
+            batch, _ = fetch_page(session, page_url(page), cache)
+            if not batch:
+                break
+            contributors.extend(batch)
+            if len(batch) < per_page:
+                break
+            page += 1
     return contributors
 
 
@@ -72,6 +194,13 @@ def build_markdown(contributors: List[Dict], cols: int = 7, image_size: int = 80
     return "\n\n".join(lines)
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate a Markdown grid of contributor avatars")
     parser.add_argument("--repo", required=True, help="GitHub repo in owner/name form")
@@ -79,6 +208,10 @@ def main() -> None:
     parser.add_argument("--cols", type=int, default=7, help="Number of avatars per row (default 7)")
     parser.add_argument("--image_size", type=int, default=80, help="Avatar size in px (default 80)")
     parser.add_argument("--output", "-o", default="-", help="Output file (default: stdout, use '-' for stdout)")
+    parser.add_argument("--api-url", default=API_URL, help=f"GitHub REST API base URL (default {API_URL})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"ETag cache directory (default {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the ETag cache")
+    parser.add_argument("--workers", type=positive_int, default=8, help="Concurrent page fetches (default 8)")
 
     args = parser.parse_args()
     token = args.token or os.getenv("GITHUB_TOKEN")
@@ -89,7 +222,14 @@ def main() -> None:
         parser.error("--repo must be in 'owner/name' form")
     owner, repo = args.repo.split("/", 1)
 
-    contributors = fetch_contributors(owner, repo, token)
+    contributors = fetch_contributors(
+        owner,
+        repo,
+        token,
+        api_url=args.api_url,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        workers=args.workers,
+    )
     if not contributors:
         sys.exit("No contributors found. Is the repository correct and does the token have access?")
 
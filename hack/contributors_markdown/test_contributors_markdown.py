@@ -0,0 +1,121 @@
+"""
+Tests for contributors_markdown.py against a local stand-in for the GitHub API
+
+    python -m pytest test_contributors_markdown.py
+"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip("requests")
+
+from contributors_markdown import fetch_contributors  # noqa: E402
+
+PER_PAGE = 2
+CONTRIBUTORS = [
+    {"login": f"user{i}", "avatar_url": f"https://avatars.example/u/{i}?v=4", "html_url": f"https://github.com/user{i}"}
+    for i in range(5)
+]
+
+
+class FakeGitHub(ThreadingHTTPServer):
+    """Serves CONTRIBUTORS in pages, with Link headers and ETags like the GitHub API."""
+
+    def __init__(self, link_header: bool = True) -> None:
+        super().__init__(("127.0.0.1", 0), FakeGitHubHandler)
+        self.link_header = link_header
+        self.requests: list[tuple[int, str | None, str | None]] = []  # (page, If-None-Match, Authorization)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query["page"][0])
+        per_page = int(query["per_page"][0])
+        with self.server.lock:
+            self.server.requests.append((page, self.headers.get("If-None-Match"), self.headers.get("Authorization")))
+
+        etag = f'"page-{page}"'
+        last = -(-len(CONTRIBUTORS) // per_page)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._link(page, per_page, last)
+            self.end_headers()
+            return
+
+        body = json.dumps(CONTRIBUTORS[(page - 1) * per_page:page * per_page]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self._link(page, per_page, last)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _link(self, page: int, per_page: int, last: int) -> None:
+        if self.server.link_header and page < last:
+            base = f"{self.server.url}{urlparse(self.path).path}?per_page={per_page}"
+            self.send_header("Link", f'<{base}&page={page + 1}>; rel="next", <{base}&page={last}>; rel="last"')
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def github(request):
+    server = FakeGitHub(**getattr(request, "param", {}))
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(github, token="t0ken", cache_dir=None):
+    return fetch_contributors("octo", "repo", token, per_page=PER_PAGE, api_url=github.url,
+                              cache_dir=cache_dir, workers=4)
+
+
+def test_link_header_fans_out_to_every_page(github):
+    assert fetch(github) == CONTRIBUTORS
+    # page 1 first, then each remaining page exactly once
+    pages = [page for page, _, _ in github.requests]
+    assert pages[0] == 1
+    assert sorted(pages) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("github", [{"link_header": False}], indirect=True)
+def test_without_link_header_pages_are_walked_until_a_short_page(github):
+    assert fetch(github) == CONTRIBUTORS
+    assert [page for page, _, _ in github.requests] == [1, 2, 3]
+
+
+def test_unchanged_pages_are_served_from_the_etag_cache(github, tmp_path):
+    first = fetch(github, cache_dir=str(tmp_path))
+    github.requests.clear()
+
+    assert fetch(github, cache_dir=str(tmp_path)) == first == CONTRIBUTORS
+    # every page was revalidated with the ETag from the first run, and answered with a 304
+    assert sorted((page, etag) for page, etag, _ in github.requests) == [
+        (1, '"page-1"'), (2, '"page-2"'), (3, '"page-3"'),
+    ]
+
+
+def test_etag_cache_is_kept_per_token(github, tmp_path):
+    fetch(github, token="first", cache_dir=str(tmp_path))
+    github.requests.clear()
+
+    assert fetch(github, token="second", cache_dir=str(tmp_path)) == CONTRIBUTORS
+    # nothing cached for this token, so no request is conditional
+    assert all(etag is None for _, etag, _ in github.requests)
+    assert all(auth == "Bearer second" for _, _, auth in github.requests)
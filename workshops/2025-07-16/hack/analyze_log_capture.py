@@ -2,58 +2,60 @@
 """
 Analyze notebook for BAML log capture success/failure
 """
-import json
 import sys
 import os
 
-def check_logs(notebook_path):
+from notebook_stream import iter_cell_summaries
+
+LOG_PATTERN = '---Parsed Response (class DoneForNow)---'
+PATTERNS = [LOG_PATTERN, 'Parsed Response', 'Captured BAML Logs', 'No BAML Logs Captured']
+
+def check_logs(notebook_path, stream=False):
     """Check if BAML logs were captured in the notebook"""
     
     if not os.path.exists(notebook_path):
         print(f"❌ Notebook not found: {notebook_path}")
         return False, False
-        
-    with open(notebook_path) as f:
-        nb = json.load(f)
     
     found_log_pattern = False
     found_capture_test = False
     
-    for i, cell in enumerate(nb['cells']):
-        if cell['cell_type'] == 'code' and 'outputs' in cell:
+    for cell in iter_cell_summaries(notebook_path, PATTERNS, stream=stream):
+        i = cell.index
+        if cell.cell_type == 'code' and cell.has_outputs_key:
             # Check if this is a log capture test cell
-            source = ''.join(cell.get('source', []))
-            if 'run_with_baml_logs' in source:
+            if 'run_with_baml_logs' in cell.source:
                 found_capture_test = True
                 print(f'Found log capture test in cell {i}')
                 
                 # Check outputs for BAML logs
-                for output in cell['outputs']:
-                    if output.get('output_type') == 'stream' and 'text' in output:
-                        text = ''.join(output['text'])
+                for output in cell.outputs:
+                    if output.output_type == 'stream' and output.has_text:
                         # Look for the specific BAML log pattern
-                        if '---Parsed Response (class DoneForNow)---' in text:
+                        if LOG_PATTERN in output.first_lines:
                             found_log_pattern = True
                             print(f'✅ FOUND BAML LOG PATTERN in cell {i} output!')
-                            log_lines = [line for line in text.split('\n') if 'Parsed Response' in line]
-                            if log_lines:
-                                print(f'Log excerpt: {log_lines[0]}')
+                            if 'Parsed Response' in output.first_lines:
+                                print(f"Log excerpt: {output.first_lines['Parsed Response']}")
                         
                         # Also check for our test markers
-                        if 'Captured BAML Logs' in text:
+                        if 'Captured BAML Logs' in output.first_lines:
                             print(f'Found "Captured BAML Logs" section in cell {i}')
-                        if 'No BAML Logs Captured' in text:
+                        if 'No BAML Logs Captured' in output.first_lines:
                             print(f'Found "No BAML Logs Captured" section in cell {i}')
     
     return found_capture_test, found_log_pattern
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python analyze_log_capture.py <notebook_path>")
+    # --stream walks the notebook incrementally instead of loading it whole
+    stream = '--stream' in sys.argv
+    args = [a for a in sys.argv[1:] if a != '--stream']
+    if len(args) != 1:
+        print("Usage: python analyze_log_capture.py [--stream] <notebook_path>")
         sys.exit(1)
         
-    notebook_path = sys.argv[1]
-    capture_test_found, log_pattern_found = check_logs(notebook_path)
+    notebook_path = args[0]
+    capture_test_found, log_pattern_found = check_logs(notebook_path, stream=stream)
 
     if not capture_test_found:
         print('❌ FAIL: No log capture test found in notebook')
@@ -68,4 +70,4 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
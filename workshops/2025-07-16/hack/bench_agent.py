@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark the walkthrough/07-agent.py agent_loop against a local stub of DetermineNextStep
+
+Sweeps thread length, tool-call ratio, clarification frequency and use_xml, and
+reports per-turn latency percentiles (time spent in the loop between model
+calls: serialization, dispatch, tools, appends), tracemalloc allocations and
+peak RSS. Each scenario runs in its own process so peak RSS is per scenario.
+
+Usage:
+    python3 bench_agent.py --save-baseline baseline.json
+    python3 bench_agent.py --compare baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from types import SimpleNamespace
+
+from bench_serializers import synthetic_events
+from walkthrough_cells import load_cells
+
+DEFAULT_LENGTHS = [10, 100, 1000]
+DEFAULT_TOOL_RATIOS = [0.5, 0.9]
+DEFAULT_CLARIFICATION_RATES = [0.0, 0.1]
+OPERATIONS = ["add", "subtract", "multiply", "divide"]
+
+class StubClient:
+    """Stands in for the BAML client: picks the next step from a seeded RNG, instantly.
+
+    Records when each call starts and ends, so the time between calls is
+    exactly what agent_loop itself spends per turn.
+    """
+    def __init__(self, turns, tool_ratio, clarification_rate, seed=0):
+        self.turns = turns
+        self.tool_ratio = tool_ratio
+        self.clarification_rate = clarification_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.call_starts = []
+        self.call_ends = []
+
+    def DetermineNextStep(self, thread_str):
+        self.call_starts.append(time.perf_counter())
+        self.calls += 1
+        roll = self.rng.random()
+        if self.calls > self.turns:
+            step = SimpleNamespace(intent="done_for_now", message="All done")
+        elif roll < self.clarification_rate:
+            step = SimpleNamespace(intent="request_more_information", message="Which numbers did you mean?")
+        elif roll < self.clarification_rate + self.tool_ratio:
+            step = SimpleNamespace(intent=self.rng.choice(OPERATIONS),
+                                   a=self.rng.randint(1, 1000), b=self.rng.randint(1, 1000))
+        else:
+            # anything else the model might say that isn't a tool, e.g. an
+            # intent with no registered handler; the loop just goes round again
+            step = SimpleNamespace(intent="noop")
+        self.call_ends.append(time.perf_counter())
+        return step
+
+    def turn_latencies(self):
+        """Seconds spent in agent_loop between the end of one call and the start of the next."""
+        return [start - end for end, start in zip(self.call_ends, self.call_starts[1:])]
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def scenario_key(scenario):
+    return (f"len={scenario['length']},tools={scenario['tool_ratio']},"
+            f"clar={scenario['clarification_rate']},xml={scenario['use_xml']}")
+
+def run_once(ns, scenario, turns, trace=False):
+    stub = StubClient(turns, scenario["tool_ratio"], scenario["clarification_rate"])
+    ns["get_baml_client"] = lambda: stub
+    thread = ns["Thread"](synthetic_events(scenario["length"]))
+    if trace:
+        tracemalloc.start()
+    ns["agent_loop"](thread, lambda message: "I meant 3 and 4", use_xml=scenario["use_xml"])
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return stub, peak
+    return stub, None
+
+def run_scenario(scenario, turns, repeat):
+    """Runs in a worker process; returns one result row."""
+    ns = load_cells("03b-tools.py", "05-tracing.py", "07-thread.py", "07-agent.py")
+    # measure the loop the way it runs in production: no progress prints, no trace sinks
+    ns["set_production_mode"]()
+    latencies, p50s, p95s = [], [], []
+    for _ in range(repeat):
+        stub, _ = run_once(ns, scenario, turns)
+        run_latencies = stub.turn_latencies()
+        latencies.extend(run_latencies)
+        p50s.append(percentile(run_latencies, 50))
+        p95s.append(percentile(run_latencies, 95))
+    # allocations are measured on a separate run, tracemalloc slows everything down
+    _, alloc_peak = run_once(ns, scenario, turns, trace=True)
+    return {
+        **scenario,
+        "key": scenario_key(scenario),
+        "turns": len(latencies),
+        # median across runs, so one noisy run doesn't move the numbers
+        "p50_ms": percentile(p50s, 50) * 1000,
+        "p95_ms": percentile(p95s, 50) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "alloc_peak_kb": alloc_peak / 1024,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def compare(results, baseline_path, threshold):
+    """Print deltas against a saved baseline; return the keys that regressed past threshold."""
+    with open(baseline_path) as f:
+        baseline = {row["key"]: row for row in json.load(f)["results"]}
+    regressions = []
+    print(f"\n📏 Compared to {baseline_path} (threshold {threshold:.0%}):")
+    for row in results:
+        base = baseline.get(row["key"])
+        if base is None:
+            print(f"  {row['key']}: no baseline")
+            continue
+        deltas = {}
+        for metric in ("p50_ms", "p95_ms", "alloc_peak_kb"):
+            deltas[metric] = (row[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+        worst = max(deltas, key=deltas.get)
+        icon = "❌" if deltas[worst] > threshold else "✅"
+        if deltas[worst] > threshold:
+            regressions.append(row["key"])
+        print(f"  {icon} {row['key']}: " + ", ".join(f"{m} {d:+.1%}" for m, d in deltas.items()))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent_loop against a stubbed model")
+    parser.add_argument("--lengths", type=int, nargs="+", default=DEFAULT_LENGTHS, help="Starting thread lengths in events")
+    parser.add_argument("--tool-ratios", type=float, nargs="+", default=DEFAULT_TOOL_RATIOS, help="Share of turns that call a tool")
+    parser.add_argument("--clarification-rates", type=float, nargs="+", default=DEFAULT_CLARIFICATION_RATES,
+                        help="Share of turns that ask for clarification")
+    parser.add_argument("--xml", choices=["on", "off", "both"], default="both", help="use_xml setting to sweep")
+    parser.add_argument("--turns", type=int, default=50, help="Model calls per run (default 50)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario (default 5)")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regression threshold for --compare (default 0.25)")
+    args = parser.parse_args()
+
+    xml_values = {"on": [True], "off": [False], "both": [True, False]}[args.xml]
+    scenarios = [
+        {"length": length, "tool_ratio": ratio, "clarification_rate": rate, "use_xml": use_xml}
+        for length, ratio, rate, use_xml in product(args.lengths, args.tool_ratios, args.clarification_rates, xml_values)
+    ]
+
+    results = []
+    print(f"{'scenario':<44} {'p50 ms':>8} {'p95 ms':>8} {'alloc KB':>10} {'RSS KB':>9}")
+    print("-" * 83)
+    for scenario in scenarios:
+        # a fresh process per scenario, so ru_maxrss belongs to this scenario only
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            row = pool.submit(run_scenario, scenario, args.turns, args.repeat).result()
+        results.append(row)
+        print(f"{row['key']:<44} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} "
+              f"{row['alloc_peak_kb']:>10.1f} {row['peak_rss_kb']:>9,}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"python": sys.version, "turns": args.turns, "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"💾 Wrote {len(results)} results to {args.save_baseline}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} scenario(s) regressed")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
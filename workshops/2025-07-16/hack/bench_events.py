@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compare the memory footprint of event representations for long threads
+"""
+import argparse
+import gc
+import tracemalloc
+
+from walkthrough_cells import load_cells
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+def synthetic_events(n):
+    """Calculator-agent shaped events, with small scalar payloads so per-event overhead shows."""
+    events = []
+    for i in range(n):
+        if i % 4 == 0:
+            events.append({"type": "clarification_response", "data": "I meant to multiply 3 and 4"})
+        else:
+            events.append({"type": "tool_call", "data": i})
+    return events
+
+def measure(build):
+    """Bytes allocated by build() that are still alive afterwards."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare event representation memory usage")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Thread lengths in events")
+    args = parser.parse_args()
+
+    ns = load_cells("01-agent.py", "09-state.py")
+    Event, EventLog = ns["Event"], ns["EventLog"]
+
+    print(f"{'events':>8} {'representation':<16} {'bytes':>12} {'bytes/event':>12} {'lossless':>9}")
+    print("-" * 61)
+    for size in args.sizes:
+        source = synthetic_events(size)
+        candidates = {
+            # copy the dicts (but not the payloads) so each representation pays for its own containers
+            "dicts": (lambda: [{"type": e["type"], "data": e["data"]} for e in source], lambda v: v),
+            "Event slots": (lambda: [Event.from_dict(e) for e in source], lambda v: [e.to_dict() for e in v]),
+            "EventLog": (lambda: EventLog.from_dicts(source), lambda v: v.to_dicts()),
+        }
+        for name, (build, to_dicts) in candidates.items():
+            value, used = measure(build)
+            lossless = to_dicts(value) == source
+            print(f"{size:>8} {name:<16} {used:>12,} {used / size:>12.1f} {'✅' if lossless else '❌':>8}")
+            del value
+
+if __name__ == "__main__":
+    main()
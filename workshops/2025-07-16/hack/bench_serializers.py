@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the thread serialization formats registered in walkthrough/07-thread.py
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+from walkthrough_cells import load_cells
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+# Rough offline stand-in for a BPE tokenizer: words are ~4 chars per token,
+# every punctuation character is its own token
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text):
+    """Offline token estimate, good enough to compare formats against each other."""
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        tokens += (len(piece) + 3) // 4 if piece[0].isalnum() else 1
+    return tokens
+
+def synthetic_events(n, seed=0):
+    """A thread shaped like the calculator agent's: inputs, tool calls and clarifications."""
+    rng = random.Random(seed)
+    events = [{"type": "user_input", "data": "can you multiply 3 and 4, then divide the result by 2"}]
+    while len(events) < n:
+        roll = rng.random()
+        if roll < 0.7:
+            op = rng.choice(["add", "subtract", "multiply", "divide"])
+            a, b = rng.randint(1, 1000), rng.randint(1, 1000)
+            events.append({
+                "type": "tool_call",
+                "data": {"tool": op, "operation": f"{op}({a}, {b})", "result": a * b},
+            })
+        elif roll < 0.85:
+            events.append({"type": "clarification_request", "data": "Which numbers did you mean to multiply?"})
+            events.append({"type": "clarification_response", "data": "I meant to multiply 3 and 4"})
+        else:
+            events.append({"type": "user_input", "data": f"now add {rng.randint(1, 100)} to that"})
+    return events[:n]
+
+def bench_format(ns, fmt, events, repeat):
+    """Return (best cold encode seconds, incremental seconds per append, serialized text)."""
+    Thread = ns["Thread"]
+    best = float("inf")
+    for _ in range(repeat):
+        thread = Thread(list(events))
+        start = time.perf_counter()
+        text = thread.serialize(fmt)
+        best = min(best, time.perf_counter() - start)
+
+    # per-turn cost once the prefix is cached: append one event and re-serialize
+    thread = Thread(list(events))
+    thread.serialize(fmt)
+    extra = synthetic_events(repeat + 1, seed=1)[1:]
+    start = time.perf_counter()
+    for event in extra:
+        thread.add_event(event)
+        thread.serialize(fmt)
+    incremental = (time.perf_counter() - start) / len(extra)
+    return best, incremental, text
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thread serialization formats")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Thread lengths in events")
+    parser.add_argument("--formats", nargs="+", help="Formats to run (default: all registered)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default 5)")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    ns = load_cells("07-thread.py")
+    formats = args.formats or list(ns["SERIALIZERS"])
+    unknown = [f for f in formats if f not in ns["SERIALIZERS"]]
+    if unknown:
+        parser.error(f"unknown formats: {unknown}, registered: {list(ns['SERIALIZERS'])}")
+
+    results = []
+    print(f"{'events':>7} {'format':<14} {'encode ms':>10} {'append ms':>10} {'bytes':>11} {'~tokens':>10}")
+    print("-" * 67)
+    for size in args.sizes:
+        events = synthetic_events(size)
+        for fmt in formats:
+            encode_s, append_s, text = bench_format(ns, fmt, events, args.repeat)
+            row = {
+                "events": size,
+                "format": fmt,
+                "encode_ms": encode_s * 1000,
+                "append_ms": append_s * 1000,
+                "bytes": len(text.encode("utf-8")),
+                "tokens_est": estimate_tokens(text),
+            }
+            results.append(row)
+            print(f"{size:>7} {fmt:<14} {row['encode_ms']:>10.3f} {row['append_ms']:>10.3f} "
+                  f"{row['bytes']:>11,} {row['tokens_est']:>10,}")
+        cheapest = min((r for r in results if r["events"] == size), key=lambda r: r["tokens_est"])
+        print(f"  🎯 cheapest for {size} events: {cheapest['format']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Wrote {len(results)} results to {args.json_path}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -2,86 +2,107 @@
 """
 Utility to inspect notebook cell outputs for debugging
 """
-import json
-import sys
+import argparse
+import re
 import os
 
-def inspect_notebook(notebook_path, filter_keyword=None):
+from notebook_stream import iter_cell_summaries, read_patterns_file
+
+DEFAULT_PATTERNS = ['BAML', 'Parsed', 'Response', 'Error', 'Exception']
+
+def inspect_notebook(notebook_path, filter_keyword=None, stream=False, patterns=None):
     """Inspect notebook cells and outputs"""
     
     if not os.path.exists(notebook_path):
         print(f"❌ Notebook not found: {notebook_path}")
         return
-        
-    with open(notebook_path) as f:
-        nb = json.load(f)
+    
+    patterns = patterns or DEFAULT_PATTERNS
+    # case-insensitive search instead of lower-casing every cell's source
+    keyword = re.compile(re.escape(filter_keyword), re.IGNORECASE) if filter_keyword else None
+    # pattern -> [matching lines, (cell, output, line) of the first match]
+    totals = {p: [0, None] for p in patterns}
     
     print(f"📓 Inspecting notebook: {notebook_path}")
-    print(f"📊 Total cells: {len(nb['cells'])}")
     print("=" * 60)
     
-    for i, cell in enumerate(nb['cells']):
-        if cell['cell_type'] == 'code':
-            source = ''.join(cell.get('source', []))
+    total_cells = 0
+    for cell in iter_cell_summaries(notebook_path, patterns, stream=stream):
+        total_cells += 1
+        if cell.cell_type == 'code':
+            source = cell.source
             
             # Filter by keyword if provided
-            if filter_keyword and filter_keyword.lower() not in source.lower():
+            if keyword and not keyword.search(source):
                 continue
                 
-            print(f"\n🔍 CELL {i} ({'code'})")
+            print(f"\n🔍 CELL {cell.index} ({'code'})")
             print("📝 SOURCE:")
             print(source[:300] + "..." if len(source) > 300 else source)
             
-            if 'outputs' in cell and cell['outputs']:
-                print(f"\n📤 OUTPUTS ({len(cell['outputs'])} outputs):")
-                for j, output in enumerate(cell['outputs']):
-                    output_type = output.get('output_type', 'unknown')
-                    print(f"  Output {j}: type={output_type}")
+            if cell.outputs:
+                print(f"\n📤 OUTPUTS ({len(cell.outputs)} outputs):")
+                for output in cell.outputs:
+                    output_type = output.output_type
+                    print(f"  Output {output.index}: type={output_type}")
                     
-                    if 'text' in output:
-                        text = ''.join(output['text'])
-                        print(f"    Text length: {len(text)} chars")
+                    if output.has_text:
+                        print(f"    Text length: {output.text_length} chars")
                         
                         # Show first few lines for context
-                        lines = text.split('\n')[:5]
-                        for line in lines:
+                        for line in output.head:
                             if line.strip():
                                 print(f"    > {line[:80]}...")
                                 
                         # Check for interesting patterns
-                        patterns = ['BAML', 'Parsed', 'Response', 'Error', 'Exception']
-                        found_patterns = [p for p in patterns if p in text]
+                        found_patterns = output.found_patterns
                         if found_patterns:
                             print(f"    🎯 Found patterns: {found_patterns}")
+                        for pattern in found_patterns:
+                            totals[pattern][0] += output.hit_counts[pattern]
+                            if totals[pattern][1] is None:
+                                totals[pattern][1] = (cell.index, output.index, output.first_line_numbers[pattern])
                             
-                    elif 'data' in output:
-                        data_keys = list(output['data'].keys())
-                        print(f"    Data keys: {data_keys}")
+                    elif output.data_keys is not None:
+                        print(f"    Data keys: {output.data_keys}")
                         
                     # Check for execution errors
                     if output_type == 'error':
-                        print(f"    ❌ ERROR: {output.get('ename', 'Unknown')}")
-                        print(f"    💬 Message: {output.get('evalue', 'No message')}")
-                        if 'traceback' in output:
-                            print(f"    📍 Traceback: {len(output['traceback'])} lines")
+                        print(f"    ❌ ERROR: {output.ename or 'Unknown'}")
+                        print(f"    💬 Message: {output.evalue or 'No message'}")
+                        if output.traceback_len:
+                            print(f"    📍 Traceback: {output.traceback_len} lines")
                             # Show last few lines of traceback
-                            for line in output['traceback'][-3:]:
+                            for line in output.traceback_tail:
                                 print(f"    🔍 {line.strip()}")
                         
             else:
                 print("\n📤 No outputs")
                 
             print("-" * 40)
+    
+    print(f"📊 Total cells: {total_cells}")
+    print("🎯 Pattern hits (lines, first at cell/output/line):")
+    for pattern, (count, first) in totals.items():
+        where = f"cell {first[0]} output {first[1]} line {first[2]}" if first else "-"
+        print(f"    {count:>6}  {pattern!r}  {where}")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python inspect_notebook.py <notebook_path> [filter_keyword]")
-        sys.exit(1)
-        
-    notebook_path = sys.argv[1]
-    filter_keyword = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(description='Inspect notebook cell outputs for debugging')
+    parser.add_argument('notebook_path')
+    parser.add_argument('filter_keyword', nargs='?', help='Only show code cells whose source contains this')
+    parser.add_argument('--stream', action='store_true',
+                        help='Walk the notebook incrementally instead of loading it whole (needs ijson)')
+    parser.add_argument('-p', '--pattern', action='append', help='Literal pattern to look for (repeatable)')
+    parser.add_argument('-r', '--regex', action='append', help='Regex pattern to look for within each output line (repeatable)')
+    parser.add_argument('--patterns-file', help='File with one pattern per line, "re:" prefix for regexes')
+    args = parser.parse_args()
+    
+    patterns = list(args.pattern or []) + [f're:{r}' for r in args.regex or []]
+    if args.patterns_file:
+        patterns.extend(read_patterns_file(args.patterns_file))
     
-    inspect_notebook(notebook_path, filter_keyword)
+    inspect_notebook(args.notebook_path, args.filter_keyword, stream=args.stream, patterns=patterns or None)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
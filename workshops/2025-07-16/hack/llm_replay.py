@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Record/replay stand-in for the BAML client, so agent loops can run offline
+
+Record real calls, from the notebook or from a directory with baml_src/ and
+OPENAI_API_KEY set (00-baml-setup.py is the notebook's BAML setup cell):
+
+    ns = load_cells("00-baml-setup.py", "03b-tools.py", "05-tracing.py", "07-thread.py", "07-agent.py")
+    install(ns, "record", "recordings.jsonl")
+
+then replay them later with no network or API key, optionally with latency:
+
+    ns = load_cells("03b-tools.py", "05-tracing.py", "07-thread.py", "07-agent.py")
+    install(ns, "replay", "recordings.jsonl", latency="recorded")
+
+Streamed calls (client.stream.DetermineNextStep, as used by stream_next_step)
+are recorded with their partial responses and when each one arrived, and
+replayed on the same timeline.
+
+Usage:
+    python3 llm_replay.py stats recordings.jsonl
+"""
+import asyncio
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from walkthrough_cells import load_cells
+
+# JSON conversion and the client wrapper are shared with the response cache cell
+_response_cache = load_cells("09-response-cache.py")
+to_jsonable = _response_cache["to_jsonable"]
+to_namespace = _response_cache["to_namespace"]
+from_jsonable = _response_cache["from_jsonable"]
+ClientWrapper = _response_cache["ClientWrapper"]
+AsyncClientWrapper = _response_cache["AsyncClientWrapper"]
+
+# recorded function name for client.stream.<function>(...) calls
+STREAM_PREFIX = "stream."
+
+
+def call_key(function, args, kwargs):
+    """Stable key for one client call, e.g. DetermineNextStep(thread_str)."""
+    payload = json.dumps([function, list(args), kwargs], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingStore:
+    """Append-only JSONL file of recorded calls.
+
+    Every line starts with its key, so ReplayStore can index the file by byte
+    offset without parsing the (large) thread inputs.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, function, args, kwargs, result, latency_s, partials=None):
+        """Record one call. partials are [seconds since the call started, partial output] pairs."""
+        record = {
+            "key": call_key(function, args, kwargs),
+            "function": function,
+            "class": type(result).__name__,
+            "output": to_jsonable(result),
+            "latency_s": round(latency_s, 6),
+            "args": list(args),
+            "kwargs": kwargs,
+        }
+        if partials is not None:
+            record["partials"] = partials
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class ReplayStore:
+    """Read-only index over a recordings file: key -> byte offsets of its records.
+
+    Records are only read and parsed when they're served. When the same call
+    was recorded more than once, repeats are served in recorded order and the
+    last one is reused after that.
+    """
+    _KEY_PREFIX = b'{"key": "'
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._offsets = {}
+        self._served = Counter()
+        self._lock = threading.Lock()
+        self._index()
+
+    def _index(self):
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.startswith(self._KEY_PREFIX):
+                    key = line[len(self._KEY_PREFIX):len(self._KEY_PREFIX) + 64].decode("ascii")
+                else:
+                    key = json.loads(line)["key"] if line.strip() else None
+                if key:
+                    self._offsets.setdefault(key, []).append(offset)
+                offset += len(line)
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self._offsets.values())
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def get(self, key):
+        """Return the next record for key, or None if it was never recorded."""
+        with self._lock:
+            offsets = self._offsets.get(key)
+            if not offsets:
+                return None
+            offset = offsets[min(self._served[key], len(offsets) - 1)]
+            self._served[key] += 1
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.readline())
+
+
+class RecordingStream:
+    """Passes a BAML stream's partials through, then records them with the final response."""
+    def __init__(self, stream, store, function, args, kwargs):
+        self._stream = stream
+        self._store = store
+        self._call = (STREAM_PREFIX + function, args, kwargs)
+        self._start = time.perf_counter()
+        self._partials = []
+
+    def _seen(self, partial):
+        self._partials.append([round(time.perf_counter() - self._start, 6), to_jsonable(partial)])
+        return partial
+
+    def _record(self, result):
+        function, args, kwargs = self._call
+        self._store.append(function, args, kwargs, result, time.perf_counter() - self._start, self._partials)
+        return result
+
+    def __iter__(self):
+        for partial in self._stream:
+            yield self._seen(partial)
+
+    def get_final_response(self):
+        return self._record(self._stream.get_final_response())
+
+
+class AsyncRecordingStream(RecordingStream):
+    async def __aiter__(self):
+        async for partial in self._stream:
+            yield self._seen(partial)
+
+    async def get_final_response(self):
+        return self._record(await self._stream.get_final_response())
+
+
+class RecordingStreams:
+    """client.stream of a recording client."""
+    def __init__(self, streams, store, stream_class):
+        self._streams = streams
+        self._store = store
+        self._stream_class = stream_class
+
+    def __getattr__(self, function):
+        method = getattr(self._streams, function)
+
+        def call(*args, **kwargs):
+            return self._stream_class(method(*args, **kwargs), self._store, function, args, kwargs)
+        return call
+
+
+class RecordingClient(ClientWrapper):
+    """Wraps a real client; every function call (streamed ones too) goes through and gets recorded."""
+    stream_class = RecordingStream
+
+    def __init__(self, client, store):
+        super().__init__(client)
+        self._store = store
+
+    def _save(self, key, function, args, kwargs, result, latency):
+        self._store.append(function, args, kwargs, result, latency)
+
+    def _wrap_streams(self, streams):
+        return RecordingStreams(streams, self._store, self.stream_class)
+
+
+class AsyncRecordingClient(AsyncClientWrapper, RecordingClient):
+    stream_class = AsyncRecordingStream
+
+
+class ReplayClient:
+    """Serves recorded results in place of the BAML client.
+
+    latency is seconds to sleep per call, "recorded" to sleep as long as the
+    real call took, or a callable(record) -> seconds. latency_scale multiplies
+    whichever is used. types, if given, is the generated baml_client.types
+    module; otherwise results come back as SimpleNamespace objects, which is
+    all the agent loops need (.intent, .message, .__dict__).
+    """
+    def __init__(self, store, latency=0.0, latency_scale=1.0, types=None):
+        self._store = store
+        self._latency = latency
+        self._latency_scale = latency_scale
+        self._types = types
+        self.calls = 0
+        self.misses = 0
+
+    def _delay(self, record):
+        if self._latency == "recorded":
+            seconds = record.get("latency_s", 0.0)
+        elif callable(self._latency):
+            seconds = self._latency(record)
+        else:
+            seconds = self._latency
+        return seconds * self._latency_scale
+
+    def _lookup(self, function, args, kwargs):
+        self.calls += 1
+        record = self._store.get(call_key(function, args, kwargs))
+        if record is None:
+            self.misses += 1
+            raise KeyError(f"No recording for {function} (call {self.calls}); re-record with install(ns, 'record', ...)")
+        return record
+
+    def _result(self, record):
+        return from_jsonable(record["class"], record["output"], self._types)
+
+    def _lookup_stream(self, function, args, kwargs):
+        """The recorded stream for a call, or (with no partials) a recording of the plain call."""
+        if call_key(STREAM_PREFIX + function, args, kwargs) in self._store:
+            return self._lookup(STREAM_PREFIX + function, args, kwargs)
+        return self._lookup(function, args, kwargs)
+
+    def __getattr__(self, function):
+        if function.startswith("_"):
+            raise AttributeError(function)
+        if function == "stream":
+            return ReplayStreams(self, ReplayStream)
+
+        def call(*args, **kwargs):
+            record = self._lookup(function, args, kwargs)
+            delay = self._delay(record)
+            if delay > 0:
+                time.sleep(delay)
+            return self._result(record)
+        return call
+
+
+class AsyncReplayClient(ReplayClient):
+    def __getattr__(self, function):
+        if function.startswith("_"):
+            raise AttributeError(function)
+        if function == "stream":
+            return ReplayStreams(self, AsyncReplayStream)
+
+        async def call(*args, **kwargs):
+            record = self._lookup(function, args, kwargs)
+            delay = self._delay(record)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._result(record)
+        return call
+
+
+class ReplayStream:
+    """Serves a recorded stream: its partials, then the final response.
+
+    The client's latency setting is the time to the final response; each
+    partial arrives at the same point of that time as it did when recorded.
+    """
+    def __init__(self, client, record):
+        self._client = client
+        self._record = record
+        self._partials = record.get("partials") or []
+        self._total = client._delay(record)
+        recorded = record.get("latency_s") or 0.0
+        scale = self._total / recorded if recorded else 0.0
+        self._times = [min(at * scale, self._total) for at, _ in self._partials]
+        self._now = 0.0
+
+    def _wait(self, at):
+        """Seconds to sleep so that `at` seconds into the call have passed."""
+        wait = max(0.0, at - self._now)
+        self._now = max(self._now, at)
+        return wait
+
+    def __iter__(self):
+        for at, (_, output) in zip(self._times, self._partials):
+            delay = self._wait(at)
+            if delay > 0:
+                time.sleep(delay)
+            yield to_namespace(output)
+
+    def get_final_response(self):
+        delay = self._wait(self._total)
+        if delay > 0:
+            time.sleep(delay)
+        return self._client._result(self._record)
+
+
+class AsyncReplayStream(ReplayStream):
+    async def __aiter__(self):
+        for at, (_, output) in zip(self._times, self._partials):
+            delay = self._wait(at)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield to_namespace(output)
+
+    async def get_final_response(self):
+        delay = self._wait(self._total)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._client._result(self._record)
+
+
+class ReplayStreams:
+    """client.stream of a replay client."""
+    def __init__(self, client, stream_class):
+        self._client = client
+        self._stream_class = stream_class
+
+    def __getattr__(self, function):
+        if function.startswith("_"):
+            raise AttributeError(function)
+
+        def call(*args, **kwargs):
+            return self._stream_class(self._client, self._client._lookup_stream(function, args, kwargs))
+        return call
+
+
+def install(namespace, mode, path, latency=0.0, latency_scale=1.0, types=None):
+    """Point get_baml_client / get_baml_async_client in a cell namespace at a record or replay client.
+
+    In "record" mode the namespace must already have the real getters (from
+    the BAML setup cell, 00-baml-setup.py). Returns the store.
+    """
+    if mode == "record":
+        store = RecordingStore(path)
+        get_client = namespace["get_baml_client"]
+        get_async_client = namespace.get("get_baml_async_client")
+        namespace["get_baml_client"] = lambda: RecordingClient(get_client(), store)
+        if get_async_client is not None:
+            namespace["get_baml_async_client"] = lambda: AsyncRecordingClient(get_async_client(), store)
+    elif mode == "replay":
+        store = ReplayStore(path)
+        client = ReplayClient(store, latency, latency_scale, types)
+        async_client = AsyncReplayClient(store, latency, latency_scale, types)
+        namespace["get_baml_client"] = lambda: client
+        namespace["get_baml_async_client"] = lambda: async_client
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    return store
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != "stats":
+        print("Usage: python3 llm_replay.py stats <recordings.jsonl>")
+        sys.exit(1)
+
+    functions = Counter()
+    classes = Counter()
+    latencies = []
+    with open(sys.argv[2], encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            functions[record["function"]] += 1
+            classes[record["class"]] += 1
+            latencies.append(record.get("latency_s", 0.0))
+
+    store = ReplayStore(sys.argv[2])
+    print(f"📼 {len(store)} recorded calls, {len(store._offsets)} distinct inputs")
+    for function, count in functions.most_common():
+        print(f"  {function}: {count}")
+    for cls, count in classes.most_common():
+        print(f"    → {cls}: {count}")
+    if latencies:
+        latencies.sort()
+        print(f"⏱️  recorded latency: p50 {latencies[len(latencies) // 2]:.3f}s, max {latencies[-1]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
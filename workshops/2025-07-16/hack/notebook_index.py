@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Sidecar index of pattern matches and errors in an executed notebook, so repeated
+queries and CI assertions don't have to re-parse the notebook every time
+
+  python3 notebook_index.py build  <notebook> [-p LITERAL]... [-r REGEX]... [--patterns-file F]
+  python3 notebook_index.py query  <notebook> [-p LITERAL]... [-r REGEX]... [--errors]
+  python3 notebook_index.py check  <notebook> <assertions_file>
+
+Assertion files have one check per line:
+  expect <literal>      expect-re <regex>
+  expect-not <literal>  expect-not-re <regex>
+  no-errors
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from notebook_stream import iter_cell_summaries, read_patterns_file
+
+INDEX_VERSION = 1
+
+def index_path(notebook_path):
+    return f"{notebook_path}.index.json"
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def build_index(notebook_path, patterns, stream=False):
+    """Scan the notebook once and write its index; returns the index."""
+    stat = os.stat(notebook_path)
+    index = {
+        "version": INDEX_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_hash(notebook_path),
+        # pattern -> [[cell, output, first matching line, matching lines], ...]
+        "patterns": {p: [] for p in patterns},
+        # [[cell, output, ename, evalue], ...]
+        "errors": [],
+        "cells": 0,
+    }
+    for cell in iter_cell_summaries(notebook_path, patterns, stream=stream):
+        index["cells"] += 1
+        for output in cell.outputs:
+            for pattern, count in output.hit_counts.items():
+                index["patterns"][pattern].append(
+                    [cell.index, output.index, output.first_line_numbers[pattern], count]
+                )
+            if output.output_type == 'error':
+                index["errors"].append([cell.index, output.index, output.ename, output.evalue])
+    with open(index_path(notebook_path), 'w') as f:
+        json.dump(index, f)
+    return index
+
+def load_index(notebook_path):
+    """Return the sidecar index if it still describes the notebook, else None."""
+    try:
+        with open(index_path(notebook_path)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    
+    stat = os.stat(notebook_path)
+    if stat.st_mtime_ns == index["mtime_ns"] and stat.st_size == index["size"]:
+        return index
+    # touched but maybe not changed: a hash is still far cheaper than a re-parse
+    if stat.st_size == index["size"] and file_hash(notebook_path) == index["sha256"]:
+        index["mtime_ns"] = stat.st_mtime_ns
+        with open(index_path(notebook_path), 'w') as f:
+            json.dump(index, f)
+        return index
+    return None
+
+def get_index(notebook_path, patterns=(), stream=False):
+    """Load the index, rebuilding it if it's stale or doesn't cover every requested pattern."""
+    index = load_index(notebook_path)
+    if index is not None and all(p in index["patterns"] for p in patterns):
+        return index
+    known = list(index["patterns"]) if index is not None else []
+    return build_index(notebook_path, list(dict.fromkeys(known + list(patterns))), stream=stream)
+
+def parse_assertions(path):
+    """Return [(kind, pattern)] from an assertions file."""
+    prefixes = {'expect-not-re': ('expect-not', 're:'), 'expect-re': ('expect', 're:'),
+                'expect-not': ('expect-not', ''), 'expect': ('expect', '')}
+    assertions = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            if line.strip() == 'no-errors':
+                assertions.append(('no-errors', None))
+                continue
+            keyword, _, pattern = line.partition(' ')
+            if keyword not in prefixes or not pattern:
+                raise SystemExit(f"❌ {path}:{line_number}: can't parse assertion: {line}")
+            kind, prefix = prefixes[keyword]
+            assertions.append((kind, prefix + pattern))
+    return assertions
+
+def check(index, assertions):
+    """Evaluate assertions against the index; returns True if all pass."""
+    ok = True
+    for kind, pattern in assertions:
+        if kind == 'no-errors':
+            passed = not index["errors"]
+            detail = f"{len(index['errors'])} error outputs"
+        else:
+            hits = index["patterns"][pattern]
+            passed = bool(hits) if kind == 'expect' else not hits
+            detail = f"{len(hits)} outputs match"
+        ok = ok and passed
+        label = kind if pattern is None else f"{kind} {pattern!r}"
+        print(f"{'✅' if passed else '❌'} {label} ({detail})")
+    return ok
+
+def _patterns_from_args(args):
+    patterns = list(args.pattern or []) + [f're:{r}' for r in args.regex or []]
+    if args.patterns_file:
+        patterns.extend(read_patterns_file(args.patterns_file))
+    return patterns
+
+def main():
+    parser = argparse.ArgumentParser(description='Index notebook outputs for fast repeated queries')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('build', 'query', 'check'):
+        cmd = sub.add_parser(name)
+        cmd.add_argument('notebook')
+        if name == 'check':
+            cmd.add_argument('assertions', help='Assertions file, one check per line')
+        else:
+            cmd.add_argument('-p', '--pattern', action='append', help='Literal pattern (repeatable)')
+            cmd.add_argument('-r', '--regex', action='append', help='Regex pattern (repeatable)')
+            cmd.add_argument('--patterns-file', help='File with one pattern per line, "re:" prefix for regexes')
+        if name == 'query':
+            cmd.add_argument('--errors', action='store_true', help='List error outputs')
+        cmd.add_argument('--stream', action='store_true', help='Stream the notebook when (re)building')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.notebook):
+        print(f"❌ Notebook not found: {args.notebook}")
+        sys.exit(1)
+
+    if args.command == 'build':
+        index = build_index(args.notebook, _patterns_from_args(args), stream=args.stream)
+        print(f"📇 Indexed {index['cells']} cells, {len(index['patterns'])} patterns, "
+              f"{len(index['errors'])} errors -> {index_path(args.notebook)}")
+    elif args.command == 'query':
+        patterns = _patterns_from_args(args)
+        index = get_index(args.notebook, patterns, stream=args.stream)
+        for pattern in patterns:
+            hits = index["patterns"][pattern]
+            print(f"🎯 {pattern!r}: {sum(h[3] for h in hits)} lines in {len(hits)} outputs")
+            for cell, output, line, count in hits:
+                print(f"    cell {cell} output {output} line {line} ({count} lines)")
+        if args.errors:
+            print(f"❌ {len(index['errors'])} error outputs")
+            for cell, output, ename, evalue in index["errors"]:
+                print(f"    cell {cell} output {output}: {ename}: {evalue}")
+    else:
+        assertions = parse_assertions(args.assertions)
+        patterns = [p for kind, p in assertions if p is not None]
+        index = get_index(args.notebook, patterns, stream=args.stream)
+        if not check(index, assertions):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
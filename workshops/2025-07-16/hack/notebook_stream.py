@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Walk a notebook's cells and outputs as compact summaries, optionally streaming
+the .ipynb with an event-based JSON parser so huge executed notebooks never
+have to be loaded (or have their outputs joined) in memory
+"""
+import json
+import re
+from collections import deque
+
+HEAD_LINES = 5
+TRACEBACK_TAIL = 3
+# longer lines are matched and counted in pieces so one giant line can't blow up memory
+MAX_LINE = 64 * 1024
+
+class PatternMatcher:
+    """Matches any number of literal and regex patterns against one line of output at a time.
+    
+    Pattern keys are the literal string itself, or "re:<regex>" for a regex.
+    Like grep, every pattern is matched within a single line: a regex can't
+    match across a newline, and ^/$ anchor at line boundaries. Lines over
+    MAX_LINE characters are matched in MAX_LINE pieces, so a match that
+    straddles a piece boundary is missed.
+    
+    The literals and the regexes that can be combined safely are folded into
+    one regex that rejects non-matching lines (almost all of them) in a
+    single scan, so 50 patterns cost about what one does. Lines that do match
+    are then attributed to patterns exactly, with pyahocorasick for the
+    literals when it's installed. Other regexes are checked on every line.
+    """
+    def __init__(self, patterns=()):
+        self.patterns = list(dict.fromkeys(patterns))
+        self._literals = [p for p in self.patterns if not p.startswith('re:')]
+        self._regexes = [(p, re.compile(p[3:])) for p in self.patterns if p.startswith('re:')]
+        self._combinable = {p for p, regex in self._regexes if self._can_combine(regex)}
+        self._prefilter = self._combined()
+        self._automaton = self._aho_corasick()
+    
+    @staticmethod
+    def _can_combine(regex):
+        # a regex with groups could have its backreferences renumbered, and one
+        # with inline global flags like (?i) is only valid at the very start
+        if regex.groups:
+            return False
+        try:
+            re.compile(f'(?:{regex.pattern})|(?:)', regex.flags)
+        except re.error:
+            return False
+        return True
+    
+    def _combined(self):
+        alternatives = [re.escape(p) for p in self._literals]
+        alternatives.extend(f'(?:{regex.pattern})' for p, regex in self._regexes if p in self._combinable)
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives))
+    
+    def _aho_corasick(self):
+        if len(self._literals) < 2:
+            return None
+        try:
+            import ahocorasick
+        except ImportError:
+            return None
+        automaton = ahocorasick.Automaton()
+        for pattern in self._literals:
+            automaton.add_word(pattern, pattern)
+        automaton.make_automaton()
+        return automaton
+    
+    def match(self, line):
+        """Return the keys of every pattern found in line."""
+        if not self.patterns:
+            return []
+        candidate = self._prefilter is not None and self._prefilter.search(line) is not None
+        if not candidate:
+            found = []
+        elif self._automaton is not None:
+            hits = {pattern for _, pattern in self._automaton.iter(line)}
+            found = [p for p in self._literals if p in hits]
+        else:
+            found = [p for p in self._literals if p in line]
+        found.extend(
+            p for p, regex in self._regexes
+            if (candidate or p not in self._combinable) and regex.search(line)
+        )
+        return found
+
+def read_patterns_file(path):
+    """One pattern per line; blank lines and lines starting with # are ignored."""
+    with open(path) as f:
+        return [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+
+class OutputSummary:
+    """What the analysis tools need from one output, without keeping its text."""
+    def __init__(self, index, matcher):
+        self.index = index
+        self.output_type = 'unknown'
+        self.has_text = False
+        self.text_length = 0
+        self.head = []
+        self.data_keys = None
+        self.ename = None
+        self.evalue = None
+        self.traceback_len = 0
+        self.traceback_tail = deque(maxlen=TRACEBACK_TAIL)
+        # pattern -> first line of output text containing it, and its line number
+        self.first_lines = {}
+        self.first_line_numbers = {}
+        # pattern -> number of lines containing it
+        self.hit_counts = {}
+        self._matcher = matcher
+        self._line_number = 0
+        self._carry = ''
+
+    @property
+    def found_patterns(self):
+        return [p for p in self._matcher.patterns if p in self.first_lines]
+
+    def feed_text(self, chunk):
+        """Feed the next piece of the output's text (one item of its `text` array)."""
+        self.has_text = True
+        self.text_length += len(chunk)
+        lines = (self._carry + chunk).split('\n')
+        self._carry = lines.pop()
+        for line in lines:
+            self._line(line)
+        if len(self._carry) > MAX_LINE:
+            self._line(self._carry)
+            self._carry = ''
+
+    def finish(self):
+        if self._carry or (self.has_text and len(self.head) < HEAD_LINES):
+            self._line(self._carry)
+        self._carry = ''
+
+    def _line(self, line):
+        if len(self.head) < HEAD_LINES:
+            self.head.append(line[:200])
+        for pattern in self._matcher.match(line):
+            if pattern not in self.first_lines:
+                self.first_lines[pattern] = line[:500]
+                self.first_line_numbers[pattern] = self._line_number
+            self.hit_counts[pattern] = self.hit_counts.get(pattern, 0) + 1
+        self._line_number += 1
+
+class CellSummary:
+    def __init__(self, index):
+        self.index = index
+        self.cell_type = None
+        self.source = ''
+        self.has_outputs_key = False
+        self.outputs = []
+
+def iter_cell_summaries(notebook_path, patterns=(), stream=False):
+    """Yield a CellSummary per cell. Patterns (see PatternMatcher) are matched within output lines."""
+    matcher = PatternMatcher(patterns)
+    if stream:
+        return _iter_streaming(notebook_path, matcher)
+    return _iter_loaded(notebook_path, matcher)
+
+def _iter_loaded(notebook_path, matcher):
+    with open(notebook_path) as f:
+        nb = json.load(f)
+    for i, cell in enumerate(nb['cells']):
+        summary = CellSummary(i)
+        summary.cell_type = cell['cell_type']
+        summary.source = _joined(cell.get('source', []))
+        summary.has_outputs_key = 'outputs' in cell
+        for j, output in enumerate(cell.get('outputs', [])):
+            out = OutputSummary(j, matcher)
+            out.output_type = output.get('output_type', 'unknown')
+            if 'text' in output:
+                text = output['text']
+                for chunk in ([text] if isinstance(text, str) else text):
+                    out.feed_text(chunk)
+                out.finish()
+            if 'data' in output:
+                out.data_keys = list(output['data'].keys())
+            out.ename = output.get('ename')
+            out.evalue = output.get('evalue')
+            for line in output.get('traceback', []):
+                out.traceback_len += 1
+                out.traceback_tail.append(line)
+            summary.outputs.append(out)
+        yield summary
+
+def _iter_streaming(notebook_path, matcher):
+    try:
+        import ijson
+    except ImportError:
+        raise SystemExit("❌ Streaming mode needs ijson: pip install ijson") from None
+
+    cell = out = None
+    source_parts = []
+    with open(notebook_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f):
+            if not prefix.startswith('cells.item'):
+                continue
+            if prefix == 'cells.item':
+                if event == 'start_map':
+                    cell = CellSummary(cell.index + 1 if cell else 0)
+                    source_parts = []
+                elif event == 'end_map':
+                    cell.source = ''.join(source_parts)
+                    yield cell
+                continue
+
+            field = prefix[len('cells.item.'):]
+            if field == 'cell_type':
+                cell.cell_type = value
+            elif field in ('source', 'source.item') and event == 'string':
+                source_parts.append(value)
+            elif field == 'outputs' and event == 'start_array':
+                cell.has_outputs_key = True
+            elif field == 'outputs.item':
+                if event == 'start_map':
+                    out = OutputSummary(len(cell.outputs), matcher)
+                elif event == 'end_map':
+                    out.finish()
+                    cell.outputs.append(out)
+            elif field.startswith('outputs.item.'):
+                _stream_output_field(out, field[len('outputs.item.'):], event, value)
+
+def _stream_output_field(out, field, event, value):
+    if field == 'output_type':
+        out.output_type = value
+    elif field in ('text', 'text.item') and event == 'string':
+        out.feed_text(value)
+    elif field == 'data':
+        if event == 'start_map':
+            out.data_keys = []
+        elif event == 'map_key':
+            out.data_keys.append(value)
+    elif field == 'ename':
+        out.ename = value
+    elif field == 'evalue':
+        out.evalue = value
+    elif field == 'traceback.item':
+        out.traceback_len += 1
+        out.traceback_tail.append(value)
+
+def _joined(value):
+    return value if isinstance(value, str) else ''.join(value)
@@ -0,0 +1,151 @@
+"""
+Run the chapter 7/7b agent loops against scripted stand-ins for the BAML client
+
+    python3 -m pytest hack/test_agent_loops.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from walkthrough_cells import load_cells
+
+def script():
+    return [
+        SimpleNamespace(intent="multiply", a=3, b=4),
+        SimpleNamespace(intent="parallel_tool_calls", calls=[
+            SimpleNamespace(intent="add", a=1, b=2),
+            SimpleNamespace(intent="divide", a=12, b=2),
+        ]),
+        SimpleNamespace(intent="request_more_information", message="sure?"),
+        SimpleNamespace(intent="done_for_now", message="done"),
+    ]
+
+class Client:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.stream = SimpleNamespace(DetermineNextStep=self._stream)
+
+    def DetermineNextStep(self, thread_str):
+        return self.steps.pop(0)
+
+    def _stream(self, thread_str):
+        step = self.steps.pop(0)
+        # a partial repeated unchanged means its arguments are final
+        return Stream([step, step], step)
+
+class AsyncClient(Client):
+    async def DetermineNextStep(self, thread_str):
+        await asyncio.sleep(0.01)
+        return self.steps.pop(0)
+
+    def _stream(self, thread_str):
+        step = self.steps.pop(0)
+        return AsyncStream([step, step], step)
+
+class Stream:
+    def __init__(self, partials, final):
+        self.partials = partials
+        self.final = final
+
+    def __iter__(self):
+        return iter(self.partials)
+
+    def get_final_response(self):
+        return self.final
+
+class AsyncStream(Stream):
+    async def __aiter__(self):
+        for partial in self.partials:
+            await asyncio.sleep(0)
+            yield partial
+
+    async def get_final_response(self):
+        return self.final
+
+@pytest.fixture
+def ns():
+    ns = load_cells(
+        "03b-tools.py", "05-tracing.py", "07-thread.py", "07-agent.py",
+        "08-streaming.py", "08-async-agent.py", "08-async-main.py",
+        namespace={"get_human_input": lambda question: "yes"},
+    )
+    ns["set_production_mode"]()
+    return ns
+
+def recorded(thread):
+    return [(e["type"], e["data"]["operation"] if e["type"] == "tool_call" else e["data"]) for e in thread.events[1:]]
+
+EXPECTED = [
+    ("tool_call", "multiply(3, 4)"),
+    ("tool_call", "add(1, 2)"),
+    ("tool_call", "divide(12, 2)"),
+    ("clarification_request", "sure?"),
+    ("clarification_response", "yes"),
+]
+
+def test_agent_loop(ns):
+    client = Client(script())
+    ns["get_baml_client"] = lambda: client
+    thread = ns["Thread"]([{"type": "user_input", "data": "go"}])
+
+    assert ns["agent_loop"](thread, lambda question: "yes") == "done"
+    assert recorded(thread) == EXPECTED
+
+def test_async_agent_loop_matches_sync(ns):
+    client = AsyncClient(script())
+    ns["get_baml_async_client"] = lambda: client
+    thread = ns["Thread"]([{"type": "user_input", "data": "go"}])
+
+    assert asyncio.run(ns["async_agent_loop"](thread, lambda question: "yes")) == "done"
+    assert recorded(thread) == EXPECTED
+
+def test_async_agent_loop_stops_at_max_iterations(ns):
+    client = AsyncClient([SimpleNamespace(intent="add", a=1, b=1)] * 3)
+    ns["get_baml_async_client"] = lambda: client
+    thread = ns["Thread"]([{"type": "user_input", "data": "go"}])
+
+    result = asyncio.run(ns["async_agent_loop"](thread, None, max_iterations=2))
+    assert "maximum iterations (2)" in result
+    assert len(thread.events) == 3
+
+def test_async_streaming_uses_early_call(ns):
+    client = AsyncClient([SimpleNamespace(intent="multiply", a=3, b=4), SimpleNamespace(intent="done_for_now", message="12")])
+    ns["get_baml_async_client"] = lambda: client
+    thread = ns["Thread"]([{"type": "user_input", "data": "go"}])
+
+    result = asyncio.run(ns["async_agent_loop"](thread, None, next_step=ns["async_stream_next_step"]))
+    assert result == "12"
+    assert thread.events[-1]["data"]["result"] == 12
+    assert ns["stream_stats"]()["early_used"] >= 1
+
+def test_run_threads_keeps_order_and_isolates_errors(ns):
+    clients = iter([
+        AsyncClient([SimpleNamespace(intent="done_for_now", message="first")]),
+        AsyncClient([SimpleNamespace(intent="add", a="x", b=object())]),
+        AsyncClient([SimpleNamespace(intent="done_for_now", message="third")]),
+    ])
+    # each thread asks for its client once per turn, in start order
+    by_thread = {}
+
+    def get_client():
+        task = asyncio.current_task()
+        if task not in by_thread:
+            by_thread[task] = next(clients)
+        return by_thread[task]
+    ns["get_baml_async_client"] = get_client
+    threads = [ns["Thread"]([{"type": "user_input", "data": str(i)}]) for i in range(3)]
+
+    results = asyncio.run(ns["run_threads"](threads, None, concurrency=2))
+    assert results[0] == "first"
+    assert isinstance(results[1], Exception)
+    assert results[2] == "third"
+
+def test_async_main(ns, capsys):
+    client = AsyncClient([SimpleNamespace(intent="done_for_now", message="hi")] * 2)
+    ns["get_baml_async_client"] = lambda: client
+
+    asyncio.run(ns["main"](messages=["a", "b"]))
+    out = capsys.readouterr().out
+    assert "Starting 2 agents" in out
+    assert "'b': hi" in out
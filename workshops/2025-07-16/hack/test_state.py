@@ -0,0 +1,75 @@
+"""
+Tests for the 09-state.py ThreadStore and EventLog
+
+    python3 -m pytest hack/test_state.py
+"""
+import pytest
+
+from walkthrough_cells import load_cells
+
+EVENTS = [
+    {"type": "user_input", "data": "multiply 3 and 4"},
+    {"type": "tool_call", "data": {"tool": "calculator", "operation": "multiply(3, 4)", "result": 12}},
+    {"type": "clarification_request", "data": "anything else?"},
+    {"type": "clarification_response", "data": "no"},
+]
+
+@pytest.fixture
+def ns():
+    return load_cells("07-thread.py", "09-state.py")
+
+def test_event_log_indexing_and_slices(ns):
+    log = ns["EventLog"](EVENTS)
+    assert len(log) == len(EVENTS)
+    assert log[1] == EVENTS[1]
+    assert log[-1] == EVENTS[-1]
+    assert log[2:] == EVENTS[2:]
+    assert log[::2] == EVENTS[::2]
+    assert log[10:] == []
+    assert list(log) == EVENTS
+
+def test_event_log_backs_a_thread(ns):
+    log_thread = ns["Thread"](ns["EventLog"](EVENTS[:2]))
+    list_thread = ns["Thread"](EVENTS[:2])
+    for fmt in ns["SERIALIZERS"]:
+        assert log_thread.serialize(fmt) == list_thread.serialize(fmt)
+
+    # appending goes through to the log, and only the new events get encoded
+    for event in EVENTS[2:]:
+        log_thread.add_event(event)
+        list_thread.add_event(event)
+    for fmt in ns["SERIALIZERS"]:
+        assert log_thread.serialize(fmt) == list_thread.serialize(fmt)
+    assert log_thread.events[1:] == EVENTS[1:]
+
+def test_append_reopen_resume_round_trip(ns, tmp_path):
+    db = str(tmp_path / "threads.db")
+    reducer = ns["thread_reducer"](window=2)
+    with ns["ThreadStore"](db, reducer=reducer, snapshot_every=2) as store:
+        thread_id = store.create(ns["Thread"](EVENTS[:1]))
+        for event in EVENTS[1:]:
+            store.append_event(thread_id, event)
+        expected = store.resume(thread_id)
+
+    # a new store on the same file, as after a restart: nothing is cached in memory
+    with ns["ThreadStore"](db, reducer=reducer, snapshot_every=2) as store:
+        assert store.get_events(thread_id) == EVENTS
+        assert store.get(thread_id).events[:] == EVENTS
+        state = store.resume(thread_id)
+        assert state == expected == ns["reduce_events"](reducer, EVENTS)
+
+        # the rebuilt thread keeps the first event and the window, with a marker for the rest
+        resumed = ns["Thread"](ns["state_to_events"](state))
+        assert resumed.events[0] == EVENTS[0]
+        assert resumed.events[1]["type"] == "compacted"
+        assert resumed.events[2:] == EVENTS[-2:]
+
+        # appending after the resume picks up where the snapshot left off
+        store.append_event(thread_id, {"type": "user_input", "data": "thanks"})
+        assert store.resume(thread_id)["count"] == len(EVENTS) + 1
+
+def test_resume_without_reducer_fails(ns, tmp_path):
+    with ns["ThreadStore"](str(tmp_path / "threads.db")) as store:
+        thread_id = store.create(ns["Thread"](EVENTS))
+        with pytest.raises(ValueError):
+            store.resume(thread_id)
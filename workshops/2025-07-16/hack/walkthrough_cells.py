@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Load walkthrough/*.py notebook cells into a namespace outside of the notebook
+"""
+from pathlib import Path
+
+WALKTHROUGH_DIR = Path(__file__).resolve().parent.parent / "walkthrough"
+
+def load_cells(*names, namespace=None):
+    """Exec walkthrough files in order into one namespace, the way the notebook runs them.
+
+    The cells rely on globals defined by earlier cells (e.g. get_baml_client from
+    the BAML setup cell), so callers can pre-populate `namespace` with stand-ins.
+    """
+    ns = namespace if namespace is not None else {}
+    ns.setdefault("__name__", "walkthrough")
+    for name in names:
+        path = WALKTHROUGH_DIR / name
+        exec(compile(path.read_text(), str(path), "exec"), ns)
+    return ns
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Warm notebook test harness.
+
+Does what test_notebook_colab_sim.sh does, without paying for a fresh venv and a
+cold kernel on every run:
+- the venv is cached under ./tmp/envs/<hash of the dependency set> and reused
+  until the dependencies change; packages the notebooks `!pip install`
+  themselves count as dependencies, so they're already in the env and a
+  notebook's pip cell doesn't change it under the next run
+- a pool of kernels is started ahead of time, so each notebook gets a fresh,
+  already-running kernel while the next one warms up in the background
+- per-cell wall times for every notebook go to a JSON report
+
+Usage:
+    python3 notebook_harness.py nb1.ipynb [nb2.ipynb ...] [--dep baml-py] [--report report.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_DEPS = ["notebook", "nbconvert", "ipykernel"]
+ENV_MARKER = ".ready"
+# set when we've re-executed ourselves inside the cached env
+ENV_VAR = "NOTEBOOK_HARNESS_ENV"
+# pip options whose value is the next argument, not a requirement
+PIP_OPTIONS_WITH_VALUE = {"-r", "--requirement", "-c", "--constraint", "-i", "--index-url",
+                          "--extra-index-url", "-f", "--find-links", "-t", "--target"}
+
+
+def notebook_pip_requirements(notebooks):
+    """Requirements installed by the notebooks' own `!pip install` / `%pip install` lines."""
+    reqs = []
+    for notebook in notebooks:
+        cells = json.loads(Path(notebook).read_text()).get("cells", [])
+        for cell in cells:
+            if cell.get("cell_type") != "code":
+                continue
+            source = cell.get("source", "")
+            if isinstance(source, list):
+                source = "".join(source)
+            for line in source.splitlines():
+                if not line.strip().startswith(("!pip", "%pip")):
+                    continue
+                words = shlex.split(line.strip(), comments=True)
+                if words[0] not in ("!pip", "%pip") or words[1:2] != ["install"]:
+                    continue
+                skip = False
+                for word in words[2:]:
+                    if skip:
+                        skip = False
+                    elif word in PIP_OPTIONS_WITH_VALUE:
+                        skip = True
+                    elif not word.startswith("-") and not any(c in word for c in "{}$"):
+                        reqs.append(word)
+    return sorted(set(reqs))
+
+
+def env_key(deps, requirements=None):
+    """Hash of everything that decides what ends up in the venv."""
+    h = hashlib.sha256()
+    h.update(sys.version.encode())
+    for dep in sorted(set(deps)):
+        h.update(dep.encode() + b"\0")
+    if requirements:
+        h.update(Path(requirements).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def ensure_env(env_dir, deps, requirements=None, refresh=False):
+    """Create the venv at env_dir unless a finished one is already there.
+
+    Returns (python path, reused).
+    """
+    env_dir = Path(env_dir)
+    python = env_dir / "bin" / "python"
+    if (env_dir / ENV_MARKER).exists() and python.exists() and not refresh:
+        return python, True
+
+    if env_dir.exists():
+        shutil.rmtree(env_dir)
+    print(f"🐍 Creating cached Python virtual environment in: {env_dir}")
+    subprocess.run([sys.executable, "-m", "venv", str(env_dir)], check=True)
+    print("📦 Installing Jupyter dependencies (only happens when the dependency set changes)...")
+    cmd = [str(python), "-m", "pip", "install", "--quiet", *deps]
+    if requirements:
+        cmd += ["-r", str(requirements)]
+    subprocess.run(cmd, check=True)
+    # only mark the env usable once pip has finished, so an interrupted
+    # install gets redone instead of reused
+    (env_dir / ENV_MARKER).write_text(json.dumps({"deps": sorted(set(deps)), "requirements": requirements}))
+    return python, False
+
+
+class KernelPool:
+    """Keeps `size` started-and-ready kernels around.
+
+    Kernels are never reused between notebooks (that would leak globals from one
+    notebook into the next); instead a replacement starts in the background as
+    soon as one is handed out, so the next notebook doesn't wait on kernel startup.
+    """
+    def __init__(self, size=2, kernel_name="python3", cwd=None):
+        self.kernel_name = kernel_name
+        self.cwd = cwd
+        self._ready = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, size) + 1)
+        for _ in range(size):
+            self._executor.submit(self._start)
+
+    def _start(self):
+        from jupyter_client import KernelManager
+        try:
+            km = KernelManager(kernel_name=self.kernel_name)
+            km.start_kernel(cwd=self.cwd)
+            kc = km.client()
+            kc.start_channels()
+            try:
+                kc.wait_for_ready(timeout=60)
+            finally:
+                kc.stop_channels()
+            self._ready.put(km)
+        except Exception as e:
+            self._ready.put(e)
+
+    def acquire(self):
+        """Take a warm kernel manager and start warming its replacement."""
+        km = self._ready.get()
+        self._executor.submit(self._start)
+        if isinstance(km, Exception):
+            raise km
+        return km
+
+    def release(self, km):
+        """Shut a used kernel down in the background."""
+        self._executor.submit(km.shutdown_kernel, now=True)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        while not self._ready.empty():
+            km = self._ready.get()
+            if not isinstance(km, Exception):
+                km.shutdown_kernel(now=True)
+
+
+def run_notebook(notebook_path, workdir, pool, timeout=120):
+    """Execute one notebook in workdir on a pooled kernel, timing each code cell."""
+    import nbformat
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellExecutionError, CellTimeoutError
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    target = workdir / "test_notebook.ipynb"
+    shutil.copy(notebook_path, target)
+    nb = nbformat.read(target, as_version=4)
+
+    result = {"notebook": str(notebook_path), "workdir": str(workdir), "status": "ok", "cells": []}
+    start = time.perf_counter()
+    km = pool.acquire()
+    result["kernel_wait_s"] = round(time.perf_counter() - start, 4)
+
+    client = NotebookClient(nb, km=km, timeout=timeout, kernel_name=pool.kernel_name)
+    try:
+        with client.setup_kernel():
+            # pooled kernels start before we know where the notebook runs
+            client.kc.execute_interactive(f"import os; os.chdir({str(workdir.resolve())!r})",
+                                          silent=True, store_history=False, timeout=timeout)
+            for index, cell in enumerate(nb.cells):
+                if cell.cell_type != "code":
+                    continue
+                status = "ok"
+                cell_start = time.perf_counter()
+                try:
+                    client.execute_cell(cell, index)
+                except (CellExecutionError, CellTimeoutError) as e:
+                    if isinstance(e, CellTimeoutError):
+                        status, error = "timeout", f"cell timed out after {timeout}s"
+                    else:
+                        status, error = "error", f"{e.ename}: {e.evalue}"
+                    result["status"] = status
+                    result["error"] = error
+                result["cells"].append({
+                    "index": index,
+                    "wall_s": round(time.perf_counter() - cell_start, 4),
+                    "status": status,
+                    "source_head": cell.source.splitlines()[0][:80] if cell.source else "",
+                })
+                if result["status"] != "ok":
+                    # stop at the first failure, just like ExecutePreprocessor
+                    break
+    finally:
+        pool.release(km)
+        # save whatever ran, outputs included, for the analysis tools in hack/
+        nbformat.write(nb, target)
+
+    result["wall_s"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_suite(notebooks, run_dir, pool_size=2, timeout=120):
+    if 'OPENAI_API_KEY' in os.environ:
+        print("✅ OPENAI_API_KEY is set")
+    else:
+        print("⚠️  Warning: OPENAI_API_KEY not set")
+
+    pool = KernelPool(size=min(pool_size, len(notebooks)) or 1, cwd=str(run_dir))
+    results = []
+    try:
+        for i, notebook in enumerate(notebooks):
+            workdir = run_dir / f"{i:02d}_{Path(notebook).stem}"
+            print(f"🚀 Executing {notebook} in {workdir}")
+            result = run_notebook(notebook, workdir, pool, timeout=timeout)
+            results.append(result)
+            icon = "✅" if result["status"] == "ok" else "❌"
+            slowest = max(result["cells"], key=lambda c: c["wall_s"], default=None)
+            print(f"{icon} {result['status']} in {result['wall_s']:.2f}s "
+                  f"(kernel wait {result['kernel_wait_s']:.2f}s, {len(result['cells'])} cells"
+                  + (f", slowest cell {slowest['index']} {slowest['wall_s']:.2f}s)" if slowest else ")"))
+            if result["status"] != "ok":
+                print(f"   💬 {result.get('error')}")
+    finally:
+        pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execute notebooks in a cached env with a warm kernel pool")
+    parser.add_argument("notebooks", nargs="+")
+    parser.add_argument("--dep", action="append", default=[], help="Extra pip requirement for the env (repeatable)")
+    parser.add_argument("--requirements", help="requirements.txt to install into the env")
+    parser.add_argument("--env-root", default="./tmp/envs", help="Where cached envs live")
+    parser.add_argument("--refresh-env", action="store_true", help="Rebuild the env even if a cached one exists")
+    parser.add_argument("--pool-size", type=int, default=2, help="Kernels to keep warm")
+    parser.add_argument("--timeout", type=int, default=120, help="Per-cell timeout in seconds")
+    parser.add_argument("--report", help="JSON report path (default: <run dir>/report.json)")
+    args = parser.parse_args()
+
+    notebooks = [Path(nb).resolve() for nb in args.notebooks]
+    missing = [str(nb) for nb in notebooks if not nb.exists()]
+    if missing:
+        print(f"❌ Notebook not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    deps = DEFAULT_DEPS + args.dep + notebook_pip_requirements(notebooks)
+    requirements = str(Path(args.requirements).resolve()) if args.requirements else None
+    key = env_key(deps, requirements)
+    env_dir = Path(args.env_root).resolve() / key
+
+    if os.environ.get(ENV_VAR) != key:
+        setup_start = time.perf_counter()
+        python, reused = ensure_env(env_dir, deps, requirements, refresh=args.refresh_env)
+        print(f"{'♻️  Reusing' if reused else '✨ Built'} env {key} in {time.perf_counter() - setup_start:.2f}s")
+        # re-run ourselves with the env's interpreter so kernels and nbclient come from it
+        os.environ[ENV_VAR] = key
+        os.environ["NOTEBOOK_HARNESS_ENV_REUSED"] = "1" if reused else "0"
+        os.environ["PATH"] = f"{python.parent}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.execv(str(python), [str(python), os.path.abspath(__file__), *sys.argv[1:]])
+
+    run_dir = Path("./tmp") / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"📁 Test directory will be preserved for inspection: {run_dir}")
+
+    start = time.perf_counter()
+    results = run_suite(notebooks, run_dir.resolve(), pool_size=args.pool_size, timeout=args.timeout)
+    report = {
+        "env": {"key": key, "path": str(env_dir), "reused": os.environ.get("NOTEBOOK_HARNESS_ENV_REUSED") == "1"},
+        "run_dir": str(run_dir),
+        "total_s": round(time.perf_counter() - start, 4),
+        "notebooks": results,
+    }
+    report_path = Path(args.report) if args.report else run_dir / "report.json"
+    report_path.write_text(json.dumps(report, indent=2))
+
+    failed = [r for r in results if r["status"] != "ok"]
+    print(f"\n📊 {len(results) - len(failed)}/{len(results)} notebooks passed in {report['total_s']:.2f}s")
+    print(f"💾 Per-cell timings written to {report_path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
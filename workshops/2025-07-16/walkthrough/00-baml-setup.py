@@ -0,0 +1,112 @@
+import subprocess
+import os
+import glob
+import hashlib
+
+# Try to import Google Colab userdata, but don't fail if not in Colab
+try:
+    from google.colab import userdata
+    IN_COLAB = True
+except ImportError:
+    IN_COLAB = False
+
+# The generated client is cached and keyed on a hash of baml_src/*.baml, so we
+# only regenerate and re-import it when the .baml files actually change
+_baml_client_cache = {
+    "generated_hash": None,
+    "loaded_hash": None,
+    "module": None,
+    "hits": 0,
+    "misses": 0,
+}
+
+def baml_src_hash(src_dir="baml_src"):
+    """Content hash of every .baml file in src_dir."""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(src_dir, "*.baml"))):
+        digest.update(os.path.basename(path).encode())
+        digest.update(b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def baml_generate():
+    src_hash = baml_src_hash()
+    try:
+        result = subprocess.run(
+            ["baml-cli", "generate"],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        if result.stdout:
+            print("[baml-cli generate]\n", result.stdout)
+        if result.stderr:
+            print("[baml-cli generate]\n", result.stderr)
+    except subprocess.CalledProcessError as e:
+        msg = (
+            f"`baml-cli generate` failed with exit code {e.returncode}\n"
+            f"--- STDOUT ---\n{e.stdout}\n"
+            f"--- STDERR ---\n{e.stderr}"
+        )
+        raise RuntimeError(msg) from None
+    _baml_client_cache["generated_hash"] = src_hash
+
+def invalidate_baml_client():
+    """Force the next get_baml_client() call to regenerate and re-import."""
+    _baml_client_cache["generated_hash"] = None
+    _baml_client_cache["loaded_hash"] = None
+    _baml_client_cache["module"] = None
+
+def baml_client_cache_stats():
+    """Return hit/miss counts for the get_baml_client() cache."""
+    return {
+        "hits": _baml_client_cache["hits"],
+        "misses": _baml_client_cache["misses"],
+        "hash": _baml_client_cache["loaded_hash"],
+    }
+
+def _load_baml_client():
+    """
+    a bunch of fun jank to work around the google colab import cache
+
+    the client is only regenerated and re-imported when baml_src/ changes,
+    so calling this on every loop iteration is cheap
+    """
+    src_hash = baml_src_hash()
+    if _baml_client_cache["module"] is not None and _baml_client_cache["loaded_hash"] == src_hash:
+        _baml_client_cache["hits"] += 1
+        return _baml_client_cache["module"]
+    _baml_client_cache["misses"] += 1
+
+    # Set API key from Colab secrets or environment
+    if IN_COLAB:
+        os.environ['OPENAI_API_KEY'] = userdata.get('OPENAI_API_KEY')
+    elif 'OPENAI_API_KEY' not in os.environ:
+        print("Warning: OPENAI_API_KEY not set. Please set it in your environment.")
+    
+    # Skip the subprocess if a run_main cell already generated this source
+    if _baml_client_cache["generated_hash"] != src_hash:
+        baml_generate()
+    
+    # Force delete all baml_client modules from sys.modules
+    import sys
+    modules_to_delete = [key for key in sys.modules.keys() if key.startswith('baml_client')]
+    for module in modules_to_delete:
+        del sys.modules[module]
+    
+    # Now import fresh
+    import baml_client
+    _baml_client_cache["loaded_hash"] = src_hash
+    _baml_client_cache["module"] = baml_client
+    return baml_client
+
+def get_baml_client():
+    return _load_baml_client().sync_client.b
+
+def get_baml_async_client():
+    """Same as get_baml_client(), but for use with `await`."""
+    _load_baml_client()
+    import baml_client.async_client
+    return baml_client.async_client.b
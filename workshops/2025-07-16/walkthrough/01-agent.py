@@ -1,13 +1,25 @@
 import json
+import sys
 from typing import Dict, Any, List
 
 # tool call or a respond to human tool
 AgentResponse = Any  # This will be the return type from b.DetermineNextStep
 
 class Event:
+    # __slots__ keeps each event to two pointers instead of a per-event dict,
+    # and interning means every event of a type shares one string
+    __slots__ = ("type", "data")
+    
     def __init__(self, type: str, data: Any):
-        self.type = type
+        self.type = sys.intern(type)
         self.data = data
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "data": self.data}
+    
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any]) -> "Event":
+        return cls(event["type"], event["data"])
 
 class Thread:
     def __init__(self, events: List[Dict[str, Any]]):
@@ -3,12 +3,28 @@ from typing import Dict, Any, List
 
 class Thread:
     def __init__(self, events: List[Dict[str, Any]]):
-        self.events = events
+        self._events = list(events)
+        # cached "[e1, e2, ..." prefix, so each turn only encodes new events
+        self._serialized = ""
+        self._serialized_count = 0
+    
+    @property
+    def events(self):
+        # read-only, so add_event is the only way in and the cached prefix can't go stale
+        return tuple(self._events)
+    
+    def add_event(self, event: Dict[str, Any]):
+        self._events.append(event)
     
     def serialize_for_llm(self):
         # can change this to whatever custom serialization you want to do, XML, etc
         # e.g. https://github.com/got-agents/agents/blob/59ebbfa236fc376618f16ee08eb0f3bf7b698892/linear-assistant-ts/src/agent.ts#L66-L105
-        return json.dumps(self.events)
+        new = ", ".join(json.dumps(event) for event in self._events[self._serialized_count:])
+        if new:
+            self._serialized = self._serialized + ", " + new if self._serialized else new
+        self._serialized_count = len(self._events)
+        # same bytes as json.dumps(self.events)
+        return "[" + self._serialized + "]"
 
 
 def agent_loop(thread: Thread) -> str:
@@ -22,13 +38,13 @@ def agent_loop(thread: Thread) -> str:
             # response to human, return the next step object
             return next_step.message
         elif next_step.intent == "add":
-            thread.events.append({
+            thread.add_event({
                 "type": "tool_call",
                 "data": next_step.__dict__
             })
             result = next_step.a + next_step.b
             print("tool_response", result)
-            thread.events.append({
+            thread.add_event({
                 "type": "tool_response",
                 "data": result
             })
@@ -1,50 +1,40 @@
 import json
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List
 
 class Thread:
     def __init__(self, events: List[Dict[str, Any]]):
-        self.events = events
+        self._events = list(events)
+        # cached "[e1, e2, ..." prefix, so each turn only encodes new events
+        self._serialized = ""
+        self._serialized_count = 0
+    
+    @property
+    def events(self):
+        # read-only, so add_event is the only way in and the cached prefix can't go stale
+        return tuple(self._events)
+    
+    def add_event(self, event: Dict[str, Any]):
+        self._events.append(event)
     
     def serialize_for_llm(self):
         # can change this to whatever custom serialization you want to do, XML, etc
         # e.g. https://github.com/got-agents/agents/blob/59ebbfa236fc376618f16ee08eb0f3bf7b698892/linear-assistant-ts/src/agent.ts#L66-L105
-        return json.dumps(self.events)
+        new = ", ".join(json.dumps(event) for event in self._events[self._serialized_count:])
+        if new:
+            self._serialized = self._serialized + ", " + new if self._serialized else new
+        self._serialized_count = len(self._events)
+        # same bytes as json.dumps(self.events)
+        return "[" + self._serialized + "]"
 
 def handle_next_step(next_step, thread: Thread) -> Thread:
-    result: float
-    
-    if next_step.intent == "add":
-        result = next_step.a + next_step.b
-        print("tool_response", result)
-        thread.events.append({
-            "type": "tool_response",
-            "data": result
-        })
-        return thread
-    elif next_step.intent == "subtract":
-        result = next_step.a - next_step.b
-        print("tool_response", result)
-        thread.events.append({
-            "type": "tool_response",
-            "data": result
-        })
-        return thread
-    elif next_step.intent == "multiply":
-        result = next_step.a * next_step.b
-        print("tool_response", result)
-        thread.events.append({
-            "type": "tool_response",
-            "data": result
-        })
-        return thread
-    elif next_step.intent == "divide":
-        result = next_step.a / next_step.b
-        print("tool_response", result)
-        thread.events.append({
-            "type": "tool_response",
-            "data": result
-        })
-        return thread
+    # TOOLS and run_tool come from the tool registry cell above
+    result = run_tool(next_step)
+    print("tool_response", result)
+    thread.add_event({
+        "type": "tool_response",
+        "data": result
+    })
+    return thread
 
 def agent_loop(thread: Thread) -> str:
     b = get_baml_client()
@@ -53,7 +43,7 @@ def agent_loop(thread: Thread) -> str:
         next_step = b.DetermineNextStep(thread.serialize_for_llm())
         print("nextStep", next_step)
         
-        thread.events.append({
+        thread.add_event({
             "type": "tool_call",
             "data": next_step.__dict__
         })
@@ -61,5 +51,5 @@ def agent_loop(thread: Thread) -> str:
         if next_step.intent == "done_for_now":
             # response to human, return the next step object
             return next_step.message
-        elif next_step.intent in ["add", "subtract", "multiply", "divide"]:
+        elif next_step.intent in TOOLS:
             thread = handle_next_step(next_step, thread)
\ No newline at end of file
@@ -0,0 +1,203 @@
+# Tool registry: maps each intent to its handler, so the agent loop
+# dispatches with a single dict lookup instead of an if/elif chain
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class Tool:
+    """A tool the agent can call, plus metadata the agent loop can use."""
+    def __init__(self, intent, handler, timeout=None, pure=False, cacheable=False):
+        self.intent = intent
+        self.handler = handler
+        self.timeout = timeout      # seconds, None means no limit
+        self.pure = pure            # same arguments always give the same result
+        self.cacheable = cacheable  # result may be reused for identical calls
+        # latency stats, updated by run_tool
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.cache_hits = 0
+
+TOOLS = {}
+
+_batch_pool = None
+_stats_lock = threading.Lock()
+
+class ToolResultCache:
+    """Bounded LRU of tool results, keyed on intent plus normalized arguments."""
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(next_step):
+        args = {k: v for k, v in next_step.__dict__.items() if k != "intent"}
+        return (next_step.intent, _normalize_args(args))
+    
+    def get(self, key):
+        """Return (True, result) on a hit, (False, None) on a miss."""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return True, self._results[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+def _normalize_args(value):
+    """Hashable form of tool arguments that doesn't depend on key order."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize_args(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize_args(v) for v in value)
+    # keep the type so add(3, 4) and add(3.0, 4.0) don't share a result
+    return (type(value).__name__, value)
+
+# shared by every thread; None until enable_tool_cache() is called
+TOOL_CACHE = None
+
+def enable_tool_cache(maxsize=1024):
+    """Reuse results of pure, cacheable tools across turns and threads."""
+    global TOOL_CACHE
+    TOOL_CACHE = ToolResultCache(maxsize)
+    return TOOL_CACHE
+
+def disable_tool_cache():
+    global TOOL_CACHE
+    TOOL_CACHE = None
+
+def register_tool(intent, timeout=None, pure=False, cacheable=False):
+    """Decorator that registers handler(next_step) as the tool for intent."""
+    def decorator(handler):
+        TOOLS[intent] = Tool(intent, handler, timeout=timeout, pure=pure, cacheable=cacheable)
+        return handler
+    return decorator
+
+def run_tool(next_step):
+    """Run the registered handler for next_step.intent and record its latency."""
+    tool = TOOLS.get(next_step.intent)
+    if tool is None:
+        raise ValueError(f"Unknown intent: {next_step.intent}")
+    
+    # the loop still records a normal tool_call event for a cached result,
+    # so the model sees exactly what it would have seen without the cache
+    cache = TOOL_CACHE if tool.pure and tool.cacheable else None
+    if cache is not None:
+        try:
+            cache_key = cache.key(next_step)
+            hit, result = cache.get(cache_key)
+        except TypeError:
+            # unhashable arguments, just run the tool
+            cache = None
+        else:
+            if hit:
+                with _stats_lock:
+                    tool.cache_hits += 1
+                return result
+    
+    result = _timed_call(tool, next_step)
+    if cache is not None:
+        cache.put(cache_key, result)
+    return result
+
+def _call_with_timeout(tool, next_step):
+    """Run the handler on its own daemon thread and wait at most tool.timeout seconds.
+    
+    Python can't kill a thread, so a call that times out keeps running in the
+    background; giving each call its own thread (instead of a shared pool)
+    means a stuck call never makes later calls queue behind it.
+    """
+    future = Future()
+    
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(tool.handler(next_step))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=target, name=f"tool-{tool.intent}", daemon=True).start()
+    return future.result(timeout=tool.timeout)
+
+def _timed_call(tool, next_step):
+    start = time.perf_counter()
+    try:
+        if tool.timeout is None:
+            return tool.handler(next_step)
+        # only tools with a timeout pay for the hop to a worker thread
+        return _call_with_timeout(tool, next_step)
+    finally:
+        _record_call(tool, time.perf_counter() - start)
+
+def _record_call(tool, elapsed):
+    with _stats_lock:
+        tool.calls += 1
+        tool.total_seconds += elapsed
+        tool.max_seconds = max(tool.max_seconds, elapsed)
+
+def run_tool_batch(calls, executor=None):
+    """Run independent tool calls concurrently; results come back in call order.
+    
+    Uses a shared thread pool unless you pass your own executor (e.g. a
+    ProcessPoolExecutor for CPU-bound tools defined in an importable module).
+    """
+    if len(calls) <= 1:
+        return [run_tool(call) for call in calls]
+    global _batch_pool
+    if executor is None:
+        if _batch_pool is None:
+            _batch_pool = ThreadPoolExecutor(thread_name_prefix="tool-batch")
+        executor = _batch_pool
+    futures = [executor.submit(run_tool, call) for call in calls]
+    return [future.result() for future in futures]
+
+def format_tool_call(next_step):
+    """Render a tool call like `add(3, 4)` from the step's arguments."""
+    args = ", ".join(str(v) for k, v in next_step.__dict__.items() if k != "intent")
+    return f"{next_step.intent}({args})"
+
+def tool_stats():
+    """Per-tool call counts and latency in milliseconds."""
+    return {
+        intent: {
+            "calls": tool.calls,
+            "avg_ms": tool.total_seconds / tool.calls * 1000 if tool.calls else 0.0,
+            "max_ms": tool.max_seconds * 1000,
+            "cache_hits": tool.cache_hits,
+        }
+        for intent, tool in TOOLS.items()
+    }
+
+@register_tool("add", pure=True, cacheable=True)
+def add(next_step):
+    return next_step.a + next_step.b
+
+@register_tool("subtract", pure=True, cacheable=True)
+def subtract(next_step):
+    return next_step.a - next_step.b
+
+@register_tool("multiply", pure=True, cacheable=True)
+def multiply(next_step):
+    return next_step.a * next_step.b
+
+@register_tool("divide", pure=True, cacheable=True)
+def divide(next_step):
+    if next_step.b == 0:
+        return "Error: Division by zero"
+    return next_step.a / next_step.b
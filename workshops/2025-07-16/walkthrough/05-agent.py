@@ -6,7 +6,7 @@ def agent_loop(thread, clarification_handler, max_iterations=3):
     iteration_count = 0
     while iteration_count < max_iterations:
         iteration_count += 1
-        print(f"🔄 Agent loop iteration {iteration_count}/{max_iterations}")
+        log(f"🔄 Agent loop iteration {iteration_count}/{max_iterations}")
         
         # Get the client
         baml_client = get_baml_client()
@@ -26,38 +26,25 @@ def agent_loop(thread, clarification_handler, max_iterations=3):
                 clarification = clarification_handler(result.message)
                 
                 # Add the clarification to the thread
-                thread.events.append({
+                thread.add_event({
                     "type": "clarification_request",
                     "data": result.message
                 })
-                thread.events.append({
+                thread.add_event({
                     "type": "clarification_response",
                     "data": clarification
                 })
                 
                 # Continue the loop with the clarification
-            elif result.intent in ['add', 'subtract', 'multiply', 'divide']:
-                # Execute the appropriate tool based on intent
-                if result.intent == 'add':
-                    result_value = result.a + result.b
-                    operation = f"add({result.a}, {result.b})"
-                elif result.intent == 'subtract':
-                    result_value = result.a - result.b
-                    operation = f"subtract({result.a}, {result.b})"
-                elif result.intent == 'multiply':
-                    result_value = result.a * result.b
-                    operation = f"multiply({result.a}, {result.b})"
-                elif result.intent == 'divide':
-                    if result.b == 0:
-                        result_value = "Error: Division by zero"
-                    else:
-                        result_value = result.a / result.b
-                    operation = f"divide({result.a}, {result.b})"
+            elif result.intent in TOOLS:
+                # Execute the tool registered for this intent
+                result_value = run_tool(result)
+                operation = format_tool_call(result)
                 
-                print(f"🔧 Calling tool: {operation} = {result_value}")
+                log(f"🔧 Calling tool: {operation} = {result_value}")
                 
                 # Add the tool call and result to the thread
-                thread.events.append({
+                thread.add_event({
                     "type": "tool_call",
                     "data": {
                         "tool": "calculator",
@@ -74,4 +61,8 @@ def agent_loop(thread, clarification_handler, max_iterations=3):
 class Thread:
     """Simple thread to track conversation history."""
     def __init__(self, events):
-        self.events = events
\ No newline at end of file
+        self.events = events
+    
+    def add_event(self, event):
+        """Append an event to the thread."""
+        self.events.append(event)
\ No newline at end of file
@@ -0,0 +1,107 @@
+# Tracing for the agent loop: every phase of a turn is timed as a span and
+# handed to the registered sinks
+#
+#   sink = add_trace_sink(JsonlSpanSink("spans.jsonl"))
+#   set_production_mode()  # spans only, no progress prints
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_SINKS = []
+VERBOSE = True
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def add_trace_sink(sink):
+    """Register a callable that receives every finished span (a dict)."""
+    TRACE_SINKS.append(sink)
+    return sink
+
+def remove_trace_sink(sink):
+    TRACE_SINKS.remove(sink)
+
+def set_production_mode(enabled=True):
+    """In production mode the agent loops stop printing progress; spans are still recorded."""
+    global VERBOSE
+    VERBOSE = not enabled
+
+def log(message):
+    if VERBOSE:
+        print(message)
+
+@contextmanager
+def span(name, **attributes):
+    """Time the enclosed block as an OpenTelemetry-style span.
+
+    Yields the span's attributes dict so the block can add to it. Spans opened
+    inside another span (also across awaits) share its trace_id and point at
+    it through parent_id. Costs next to nothing when no sinks are registered.
+    """
+    if not TRACE_SINKS:
+        yield attributes
+        return
+
+    parent = _current_span.get()
+    record = {
+        "name": name,
+        "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+        "span_id": os.urandom(8).hex(),
+        "parent_id": parent["span_id"] if parent else None,
+        "status": "ok",
+        "attributes": attributes,
+    }
+    token = _current_span.set(record)
+    start_ns = time.time_ns()
+    start = time.perf_counter_ns()
+    try:
+        yield attributes
+    except BaseException as e:
+        record["status"] = "error"
+        attributes["error"] = repr(e)
+        raise
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        _current_span.reset(token)
+        record["start_time_unix_nano"] = start_ns
+        record["end_time_unix_nano"] = start_ns + elapsed
+        record["duration_ms"] = elapsed / 1e6
+        for sink in TRACE_SINKS:
+            sink(record)
+
+class JsonlSpanSink:
+    """Appends one JSON line per span to a local file."""
+    def __init__(self, path="spans.jsonl"):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class SpanCollector:
+    """Keeps spans in memory and summarizes where the time went, per span name."""
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def summary(self):
+        totals = {}
+        for record in self.spans:
+            entry = totals.setdefault(record["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += record["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+        return totals
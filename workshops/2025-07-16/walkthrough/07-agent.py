@@ -1,104 +1,151 @@
-# Agent with configurable serialization formats
-import json
-
-class Thread:
-    """Thread that can serialize to different formats."""
-    def __init__(self, events):
-        self.events = events
-    
-    def serialize_as_json(self):
-        """Serialize thread events to pretty-printed JSON."""
-        return json.dumps(self.events, indent=2)
-    
-    def serialize_as_xml(self):
-        """Serialize thread events to XML format for better token efficiency."""
-        import yaml
-        xml_parts = ["<thread>"]
-        
-        for event in self.events:
-            event_type = event['type']
-            event_data = event['data']
-            
-            if event_type == 'user_input':
-                xml_parts.append(f'  <user_input>{event_data}</user_input>')
-            elif event_type == 'tool_call':
-                # Use YAML for tool call args - more compact than nested XML
-                yaml_content = yaml.dump(event_data, default_flow_style=False).strip()
-                xml_parts.append(f'  <{event_data["tool"]}>')
-                xml_parts.append('    ' + '\n    '.join(yaml_content.split('\n')))
-                xml_parts.append(f'  </{event_data["tool"]}>')
-            elif event_type == 'clarification_request':
-                xml_parts.append(f'  <clarification_request>{event_data}</clarification_request>')
-            elif event_type == 'clarification_response':
-                xml_parts.append(f'  <clarification_response>{event_data}</clarification_response>')
-        
-        xml_parts.append("</thread>")
-        return "\n".join(xml_parts)
-
-def agent_loop(thread, clarification_handler, use_xml=True):
-    """Run the agent loop with configurable serialization."""
-    while True:
-        # Get the client
-        baml_client = get_baml_client()
-        
-        # Serialize the thread based on format preference
-        if use_xml:
-            thread_str = thread.serialize_as_xml()
-            print(f"📄 Using XML serialization ({len(thread_str)} chars)")
+# Agent loop with configurable serialization formats (Thread is in 07-thread.py)
+
+def serialize_for_model(thread, fmt, compactor=None):
+    """The thread as the model sees it this turn, traced as the serialize span."""
+    with span("serialize", fmt=fmt, events=len(thread.events)) as attrs:
+        if compactor is not None:
+            thread_str = compactor.serialize(thread, fmt)
         else:
-            thread_str = thread.serialize_as_json()
-            print(f"📄 Using JSON serialization ({len(thread_str)} chars)")
-        
-        # Call the agent
-        result = baml_client.DetermineNextStep(thread_str)
-        
-        # Check what type of result we got based on intent
-        if hasattr(result, 'intent'):
-            if result.intent == 'done_for_now':
-                return result.message
-            elif result.intent == 'request_more_information':
-                # Get clarification from the human
-                clarification = clarification_handler(result.message)
-                
-                # Add the clarification to the thread
-                thread.events.append({
-                    "type": "clarification_request",
-                    "data": result.message
-                })
-                thread.events.append({
-                    "type": "clarification_response",
-                    "data": clarification
-                })
-                
-                # Continue the loop with the clarification
-            elif result.intent in ['add', 'subtract', 'multiply', 'divide']:
-                # Execute the appropriate tool based on intent
-                if result.intent == 'add':
-                    result_value = result.a + result.b
-                    operation = f"add({result.a}, {result.b})"
-                elif result.intent == 'subtract':
-                    result_value = result.a - result.b
-                    operation = f"subtract({result.a}, {result.b})"
-                elif result.intent == 'multiply':
-                    result_value = result.a * result.b
-                    operation = f"multiply({result.a}, {result.b})"
-                elif result.intent == 'divide':
-                    if result.b == 0:
-                        result_value = "Error: Division by zero"
+            thread_str = thread.serialize(fmt)
+        attrs["chars"] = len(thread_str)
+    return thread_str
+
+def next_action(result):
+    """What the loop should do with a DetermineNextStep result, traced as the parse span.
+
+    Returns ("done", message), ("clarify", question), ("tools", calls),
+    ("error", message) or ("ignore", intent) for an intent nothing handles,
+    where calls are the tool calls to run in the order the model asked for them.
+    """
+    with span("parse") as attrs:
+        intent = getattr(result, 'intent', None)
+        attrs["intent"] = intent
+        if intent is None:
+            return "error", "Error: Unexpected result type"
+        if intent == 'done_for_now':
+            return "done", result.message
+        if intent == 'request_more_information':
+            return "clarify", result.message
+        if intent == 'parallel_tool_calls':
+            # Independent calls batched into one round trip (see 08-agent.baml)
+            return "tools", list(result.calls)
+        if intent in TOOLS:
+            return "tools", [result]
+        return "ignore", intent
+
+def take_running_calls(calls, running):
+    """Futures for the calls that are already in flight, by position in calls.
+
+    running holds sources of calls started ahead of time: anything with
+    take(call) -> future or None, and discard() to drop what wasn't taken.
+    """
+    started = {}
+    for i, call in enumerate(calls):
+        for source in running:
+            future = source.take(call)
+            if future is not None:
+                started[i] = future
+                break
+    for source in running:
+        source.discard()
+    return started
+
+def run_tool_calls(calls, running=()):
+    """Run a turn's tool calls concurrently and return their results in call order.
+
+    Calls some source in running already started are waited on instead of
+    run again (see take_running_calls).
+    """
+    started = take_running_calls(calls, running)
+    rest = iter(run_tool_batch([call for i, call in enumerate(calls) if i not in started]))
+    return [started[i].result() if i in started else next(rest) for i in range(len(calls))]
+
+def record_clarification(thread, question, answer):
+    """Add a clarification exchange to the thread."""
+    with span("append", events=2):
+        thread.add_event({
+            "type": "clarification_request",
+            "data": question
+        })
+        thread.add_event({
+            "type": "clarification_response",
+            "data": answer
+        })
+
+def record_tool_results(thread, calls, result_values, blobs=None):
+    """Add a tool_call event per call, with its result, in call order."""
+    with span("append", events=len(calls)):
+        for call, result_value in zip(calls, result_values):
+            operation = format_tool_call(call)
+            log(f"🔧 Calling tool: {operation} = {result_value}")
+            event = {
+                "type": "tool_call",
+                "data": {
+                    "tool": "calculator",
+                    "operation": operation,
+                    "result": result_value
+                }
+            }
+            thread.add_event(blobs.externalize(event) if blobs is not None else event)
+
+def agent_loop(thread, clarification_handler, use_xml=True, fmt=None, compactor=None, blobs=None, next_step=None,
+               prefetcher=None):
+    """Run the agent loop with configurable serialization.
+
+    fmt picks any format in SERIALIZERS; without it use_xml chooses between xml and json.
+    Each turn is traced phase by phase (see 05-tracing.py).
+
+    The other options are hooks that later cells pass in:
+    - compactor shrinks what the model sees, while thread keeps every event (07-compaction.py)
+    - blobs moves large tool results out of the thread (09-blobs.py)
+    - next_step(client, thread_str) -> (result, call started early or None)
+      replaces the plain DetermineNextStep call (stream_next_step, 08-streaming.py)
+    - prefetcher starts likely tool calls before each model call (08-prefetch.py)
+    """
+    fmt = fmt or ("xml" if use_xml else "json")
+    turn = 0
+    with span("agent_loop", fmt=fmt):
+        while True:
+            turn += 1
+            with span("turn", turn=turn):
+                # Get the client
+                with span("client"):
+                    baml_client = get_baml_client()
+
+                # Serialize the thread based on format preference
+                thread_str = serialize_for_model(thread, fmt, compactor)
+                log(f"📄 Using {fmt} serialization ({len(thread_str)} chars)")
+
+                if prefetcher is not None:
+                    with span("prefetch"):
+                        prefetcher.start(thread)
+
+                # Call the agent
+                with span("llm", function="DetermineNextStep"):
+                    if next_step is not None:
+                        result, early = next_step(baml_client, thread_str)
                     else:
-                        result_value = result.a / result.b
-                    operation = f"divide({result.a}, {result.b})"
-                
-                print(f"🔧 Calling tool: {operation} = {result_value}")
-                
-                # Add the tool call and result to the thread
-                thread.events.append({
-                    "type": "tool_call",
-                    "data": {
-                        "tool": "calculator",
-                        "operation": operation,
-                        "result": result_value
-                    }
-                })
-        else:
-            return "Error: Unexpected result type"
\ No newline at end of file
+                        result, early = baml_client.DetermineNextStep(thread_str), None
+
+                # Check what the model asked for; calls started ahead of time
+                # are only picked up if it asked for tools
+                action, value = next_action(result)
+                running = [source for source in (prefetcher, early) if source is not None]
+                if action != "tools":
+                    for source in running:
+                        source.discard()
+                if action in ("done", "error"):
+                    return value
+
+                if action == "ignore":
+                    log(f"⚠️ Ignoring unknown intent: {value}")
+                elif action == "clarify":
+                    # Get clarification from the human, then continue the loop with it
+                    record_clarification(thread, value, clarification_handler(value))
+                else:
+                    # Execute the registered tools, picking up any already running
+                    with span("tool", intent=result.intent, calls=len(value), running=len(running)):
+                        result_values = run_tool_calls(value, running)
+
+                    # Add the tool calls and results to the thread
+                    record_tool_results(thread, value, result_values, blobs)
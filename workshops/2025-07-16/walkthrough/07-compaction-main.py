@@ -0,0 +1,20 @@
+def main(message="hello from the notebook!", budget=None, fmt="xml"):
+    # Function to handle clarification requests
+    def handle_clarification(question):
+        return get_human_input(f"The agent needs clarification: {question}")
+    
+    # Create a new thread with the user's message
+    thread = Thread([{"type": "user_input", "data": message}])
+    
+    print(f"🚀 Starting agent with message: '{message}'")
+    compactor = Compactor(budget=budget)
+    if budget is not None:
+        print(f"✂️ Compacting the thread to at most {budget} chars")
+    
+    # The thread keeps every event; the model only sees the compacted view
+    result = agent_loop(thread, handle_clarification, fmt=fmt, compactor=compactor)
+    
+    # Print the final response
+    print(f"\n✅ Final response: {result}")
+    view = compactor.view(thread, fmt)
+    print(f"📊 {len(thread.events)} events in the thread, {view.dropped_events} dropped to fit the budget")
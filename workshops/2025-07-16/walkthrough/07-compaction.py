@@ -0,0 +1,231 @@
+# Context window compaction (factor 3 - own your context window): a pipeline
+# of stages that shrink the thread before it's serialized for the model, plus
+# a hard budget so long threads can't grow the prompt without bound
+#
+# Compaction is incremental: each event goes through the stages and gets
+# encoded once, when it's first seen, so a turn only pays for the events
+# appended since the last one. A stage is stage(event, view) -> the event to
+# pass on (possibly rewritten), or None to leave it out; it can also edit
+# what's already in view (see CompactedView).
+import weakref
+from collections import deque
+
+def collapse_tool_pairs(event, view):
+    """Merge each tool_call that's directly followed by its tool_response into one event.
+
+    Put it first: it merges the tool_call as it was in the thread, and the
+    merged pair goes through the later stages as one event.
+    """
+    previous = view.state.get(collapse_tool_pairs)
+    if (event["type"] == "tool_response" and previous is not None
+            and previous["type"] == "tool_call" and isinstance(previous["data"], dict)
+            and "result" not in previous["data"]):
+        if view.sources and view.sources[-1] is previous:
+            view.pop()
+        event = {"type": "tool_call", "data": {**previous["data"], "result": event["data"]}}
+    view.state[collapse_tool_pairs] = event
+    return event
+
+def keep_recent_clarifications(k=2):
+    """Stage that keeps only the last k clarification request/response exchanges."""
+    kinds = ("clarification_request", "clarification_response")
+
+    def stage(event, view):
+        if event["type"] not in kinds:
+            return event
+        # starts: where each kept exchange starts in view, oldest first;
+        # kept_from: clarifications before this index are already left out
+        state = view.state.setdefault(stage, {"starts": deque(), "kept_from": 0, "requests": 0})
+        if event["type"] == "clarification_request":
+            state["requests"] += 1
+            if len(state["starts"]) == k:
+                if state["starts"]:
+                    state["starts"].popleft()
+                cutoff = state["starts"][0] if state["starts"] else len(view.events)
+                for i in range(state["kept_from"], cutoff):
+                    if view.events[i] is not None and view.events[i]["type"] in kinds:
+                        view.omit(i)
+                state["kept_from"] = cutoff
+            if k == 0:
+                return None
+            state["starts"].append(len(view.events))
+        elif k == 0 and state["requests"]:
+            return None
+        return event
+    return stage
+
+def truncate_payloads(max_chars=2000):
+    """Stage that cuts string payloads (including ones nested in dicts/lists) to max_chars."""
+    def truncate(value):
+        if isinstance(value, str) and len(value) > max_chars:
+            return value[:max_chars] + f"... [truncated {len(value) - max_chars} chars]"
+        if isinstance(value, dict):
+            return {k: truncate(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [truncate(v) for v in value]
+        return value
+
+    def stage(event, view):
+        return {"type": event["type"], "data": truncate(event["data"])}
+    return stage
+
+class CompactedView:
+    """One thread's compacted events in one format, kept up to date a turn at a time.
+
+    events[i] encodes to fragments[i] (None if the format skips it) and came
+    from the thread event sources[i]. Events left out after the fact are None
+    in events and fragments. events[1:drop_until] are dropped to fit the
+    Compactor's budget. state is scratch space for stages, keyed by stage.
+    """
+    def __init__(self, serializer):
+        self.serializer = serializer
+        self.sources = []
+        self.events = []
+        self.fragments = []
+        self.sizes = []         # chars of fragment + separator
+        self.state = {}
+        self.consumed = 0       # thread events run through the stages so far
+        self.drop_until = 1
+        self.total = 0          # sum(sizes)
+        self.dropped = 0        # sum(sizes[1:drop_until])
+        self.dropped_events = 0
+        self._body = None       # (body, fragments covered, drop_until, dropped_events)
+
+    def append(self, source, event):
+        fragment = self.serializer.encode_event(event)
+        size = 0 if fragment is None else len(fragment) + len(self.serializer.separator)
+        self.sources.append(source)
+        self.events.append(event)
+        self.fragments.append(fragment)
+        self.sizes.append(size)
+        self.total += size
+
+    def pop(self):
+        """Remove the newest event and return the thread event it came from."""
+        self.total -= self.sizes.pop()
+        self.events.pop()
+        self.fragments.pop()
+        if self._body is not None and len(self.fragments) < self._body[1]:
+            self._body = None
+        return self.sources.pop()
+
+    def omit(self, i):
+        """Leave out events[i] from now on."""
+        if self.events[i] is None:
+            return
+        if 0 < i < self.drop_until:
+            self.dropped -= self.sizes[i]
+            self.dropped_events -= 1
+        self.total -= self.sizes[i]
+        self.events[i] = self.fragments[i] = None
+        self.sizes[i] = 0
+        if self._body is not None and i < self._body[1]:
+            self._body = None
+
+    def drop_next(self):
+        """Drop the oldest kept event after the first to make room."""
+        if self.events[self.drop_until] is not None:
+            self.dropped += self.sizes[self.drop_until]
+            self.dropped_events += 1
+        self.drop_until += 1
+
+    def compacted_events(self):
+        kept = self.events[:1]
+        if self.dropped_events:
+            kept.append(_omitted_marker(self.dropped_events))
+        return [e for e in kept + self.events[self.drop_until:] if e is not None]
+
+    def body(self):
+        """The serialized body; only new fragments are joined on unless the kept prefix changed."""
+        separator = self.serializer.separator
+        if self._body is not None and self._body[2:] == (self.drop_until, self.dropped_events):
+            body, covered = self._body[:2]
+            new = [f for f in self.fragments[covered:] if f is not None]
+            if new:
+                body = separator.join([body, *new]) if body else separator.join(new)
+        else:
+            fragments = self.fragments[:1]
+            if self.dropped_events:
+                fragments.append(self.serializer.encode_event(_omitted_marker(self.dropped_events)))
+            body = separator.join(f for f in fragments + self.fragments[self.drop_until:] if f is not None)
+        self._body = (body, len(self.fragments), self.drop_until, self.dropped_events)
+        return body
+
+class Compactor:
+    """Runs compaction stages, then drops the oldest events until the thread fits `budget`.
+
+    budget is in `unit`s of the serialized thread: "chars" or "tokens" (estimated
+    as chars / 4). The first event (the user's original request) is always kept.
+    Dropped events stay dropped, so the kept prefix only changes when the
+    budget forces it.
+    """
+    def __init__(self, stages=None, budget=None, unit="chars"):
+        if unit not in ("chars", "tokens"):
+            raise ValueError(f"Unknown budget unit: {unit}")
+        self.stages = stages if stages is not None else default_stages()
+        self.budget = budget
+        self.unit = unit
+        # thread -> {fmt: CompactedView}
+        self._views = weakref.WeakKeyDictionary()
+
+    def view(self, thread, fmt):
+        """thread's CompactedView for fmt, updated with the events appended since the last call."""
+        if fmt not in SERIALIZERS:
+            raise ValueError(f"Unknown serialization format: {fmt}")
+        views = self._views.setdefault(thread, {})
+        view = views.get(fmt)
+        if view is None or view.consumed > len(thread.events):
+            # events were removed out from under us, start over
+            view = views[fmt] = CompactedView(SERIALIZERS[fmt])
+        self._extend(view, thread.events[view.consumed:])
+        return view
+
+    def compact(self, events, fmt):
+        """The compacted events for a one-off list of events."""
+        if fmt not in SERIALIZERS:
+            raise ValueError(f"Unknown serialization format: {fmt}")
+        view = CompactedView(SERIALIZERS[fmt])
+        self._extend(view, events)
+        return view.compacted_events()
+
+    def serialize(self, thread, fmt):
+        """Compacted replacement for thread.serialize(fmt)."""
+        view = self.view(thread, fmt)
+        return view.serializer.wrap(view.body())
+
+    def _extend(self, view, events):
+        for source in events:
+            event = source
+            for stage in self.stages:
+                event = stage(event, view)
+                if event is None:
+                    break
+            else:
+                view.append(source, event)
+        view.consumed += len(events)
+        if self.budget is not None:
+            self._fit_budget(view)
+
+    def _fit_budget(self, view):
+        # compare in chars: a token is estimated as 4 chars
+        limit = self.budget * 4 if self.unit == "tokens" else self.budget
+        serializer = view.serializer
+        size = len(serializer.wrap("")) + view.total - view.dropped
+        if view.drop_until == 1 and size <= limit:
+            return
+        # leave room for the marker, counting as if every event were dropped
+        marker = serializer.encode_event(_omitted_marker(len(view.events)))
+        size += 0 if marker is None else len(marker) + len(serializer.separator)
+        while view.drop_until < len(view.events) - 1 and size > limit:
+            size -= view.sizes[view.drop_until]
+            view.drop_next()
+
+def _omitted_marker(count):
+    return {"type": "compacted", "data": f"{count} earlier events omitted"}
+
+def default_stages(keep_clarifications=2, max_payload_chars=2000):
+    return [
+        collapse_tool_pairs,
+        keep_recent_clarifications(keep_clarifications),
+        truncate_payloads(max_payload_chars),
+    ]
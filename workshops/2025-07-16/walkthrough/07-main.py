@@ -1,4 +1,4 @@
-def main(message="hello from the notebook!", use_xml=True):
+def main(message="hello from the notebook!", use_xml=True, fmt=None):
     # Function to handle clarification requests
     def handle_clarification(question):
         return get_human_input(f"The agent needs clarification: {question}")
@@ -7,10 +7,10 @@ def main(message="hello from the notebook!", use_xml=True):
     thread = Thread([{"type": "user_input", "data": message}])
     
     print(f"🚀 Starting agent with message: '{message}'")
-    print(f"📋 Using {'XML' if use_xml else 'JSON'} format for thread serialization")
+    print(f"📋 Using {fmt or ('XML' if use_xml else 'JSON')} format for thread serialization")
     
     # Run the agent loop with XML serialization
-    result = agent_loop(thread, handle_clarification, use_xml=use_xml)
+    result = agent_loop(thread, handle_clarification, use_xml=use_xml, fmt=fmt)
     
     # Print the final response
     print(f"\n✅ Final response: {result}")
\ No newline at end of file
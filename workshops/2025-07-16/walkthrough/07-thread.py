@@ -0,0 +1,127 @@
+# Thread with configurable serialization formats: a registry of formats, and
+# a Thread that encodes each event once, the first time it is serialized
+import json
+import yaml
+from collections.abc import Sequence
+
+class Serializer:
+    """A thread format: how to encode one event, and how to wrap the encoded events."""
+    def __init__(self, name, encode_event, separator, wrap):
+        self.name = name
+        self.encode_event = encode_event
+        self.separator = separator
+        self.wrap = wrap
+
+# format name -> Serializer, see register_serializer below
+SERIALIZERS = {}
+
+def register_serializer(name, encode_event, separator="\n", wrap=None):
+    """Register a thread format. encode_event may return None to skip an event."""
+    SERIALIZERS[name] = Serializer(name, encode_event, separator, wrap or (lambda body: body))
+    return SERIALIZERS[name]
+
+class EventsView(Sequence):
+    """Read-only view of a thread's events: indexing, slicing and iteration, no writes."""
+    def __init__(self, events):
+        self._events = events
+    
+    def __len__(self):
+        return len(self._events)
+    
+    def __getitem__(self, index):
+        return self._events[index]
+    
+    def __repr__(self):
+        return f"EventsView({list(self._events)!r})"
+
+class Thread:
+    """Thread that can serialize to different formats.
+    
+    events is read-only and add_event() is the only writer, so the cached
+    serializations can't go stale; events are never edited once added. A
+    list passed in is copied; other append-only stores (an EventLog, see
+    09-state.py) are used as they are.
+    """
+    def __init__(self, events):
+        self._events = list(events) if isinstance(events, (list, tuple)) else events
+        # format name -> (serialized body, number of events it covers)
+        self._serialized = {}
+    
+    @property
+    def events(self):
+        return EventsView(self._events)
+    
+    def add_event(self, event):
+        """Append an event."""
+        self._events.append(event)
+    
+    def _serialize_body(self, fmt, encode_event, separator):
+        """Return the encoded body for fmt, only encoding events added since the last call."""
+        body, count = self._serialized.get(fmt, ("", 0))
+        fragments = [encode_event(event) for event in self._events[count:]]
+        new = separator.join(f for f in fragments if f is not None)
+        if new:
+            body = body + separator + new if body else new
+        self._serialized[fmt] = (body, len(self._events))
+        return body
+    
+    def serialize(self, fmt):
+        """Serialize thread events with any registered format."""
+        if fmt not in SERIALIZERS:
+            raise ValueError(f"Unknown serialization format: {fmt}")
+        serializer = SERIALIZERS[fmt]
+        return serializer.wrap(self._serialize_body(fmt, serializer.encode_event, serializer.separator))
+    
+    def serialize_as_json(self):
+        """Serialize thread events to pretty-printed JSON."""
+        return self.serialize("json")
+    
+    def serialize_as_xml(self):
+        """Serialize thread events to XML format for better token efficiency."""
+        return self.serialize("xml")
+
+def _json_event(event):
+    """One element of an indent=2 JSON list (JSON strings never contain raw newlines)."""
+    return json.dumps(event, indent=2).replace("\n", "\n  ")
+
+def _compact_json_event(event):
+    return json.dumps(event, separators=(",", ":"))
+
+def _xml_event(event):
+    """XML for a single event, or None for event types we don't render."""
+    event_type = event['type']
+    event_data = event['data']
+    
+    if event_type == 'user_input':
+        return f'  <user_input>{event_data}</user_input>'
+    elif event_type == 'tool_call':
+        # Use YAML for tool call args - more compact than nested XML
+        yaml_content = yaml.dump(event_data, default_flow_style=False).strip()
+        return "\n".join([
+            f'  <{event_data["tool"]}>',
+            '    ' + '\n    '.join(yaml_content.split('\n')),
+            f'  </{event_data["tool"]}>',
+        ])
+    elif event_type == 'clarification_request':
+        return f'  <clarification_request>{event_data}</clarification_request>'
+    elif event_type == 'clarification_response':
+        return f'  <clarification_response>{event_data}</clarification_response>'
+    elif event_type == 'compacted':
+        # marker left behind by a Compactor, see 07-compaction.py
+        return f'  <compacted>{event_data}</compacted>'
+    return None
+
+def _line_event(event):
+    """One event per line: `type: data`, with non-string data as compact JSON."""
+    data = event['data']
+    if isinstance(data, str):
+        text = data.replace("\n", "\\n")
+    else:
+        text = json.dumps(data, separators=(",", ":"))
+    return f"{event['type']}: {text}"
+
+# same bytes as json.dumps(events, indent=2)
+register_serializer("json", _json_event, ",\n  ", lambda body: "[\n  " + body + "\n]" if body else "[]")
+register_serializer("compact_json", _compact_json_event, ",", lambda body: "[" + body + "]")
+register_serializer("xml", _xml_event, "\n", lambda body: "<thread>\n" + body + "\n</thread>" if body else "<thread>\n</thread>")
+register_serializer("lines", _line_event, "\n")
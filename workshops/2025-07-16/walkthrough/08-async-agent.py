@@ -0,0 +1,102 @@
+# Async agent loop: many threads share one LLM client, and none of them
+# blocks a worker while it waits on the model
+#
+#   results = await run_threads([Thread([{"type": "user_input", "data": m}]) for m in messages],
+#                               handle_clarification, concurrency=10)
+import asyncio
+import inspect
+
+async def run_tool_async(call):
+    """run_tool without blocking the event loop.
+    
+    Only pure tools with no timeout run inline; anything else (including a
+    pure tool whose timeout makes run_tool wait on another thread) goes to a
+    worker thread so it can't stall the other conversations.
+    """
+    tool = TOOLS.get(call.intent)
+    if tool is not None and tool.pure and tool.timeout is None:
+        return run_tool(call)
+    return await asyncio.to_thread(run_tool, call)
+
+async def async_run_tool_calls(calls, running=()):
+    """run_tool_calls for the async loop: concurrent, in call order, without blocking the event loop."""
+    started = take_running_calls(calls, running)
+    
+    async def result_of(i, call):
+        if i in started:
+            return await asyncio.wrap_future(started[i])
+        return await run_tool_async(call)
+    return await asyncio.gather(*(result_of(i, call) for i, call in enumerate(calls)))
+
+async def async_agent_loop(thread, clarification_handler, fmt="xml", max_iterations=None, compactor=None, blobs=None,
+                           next_step=None, prefetcher=None):
+    """The 07-agent.py loop on the BAML async client, sharing its per-turn steps.
+    
+    clarification_handler may be a plain function or a coroutine function.
+    The hooks are agent_loop's, except next_step is a coroutine function
+    (async_stream_next_step in 08-streaming.py). A Prefetcher tracks one
+    thread, so give each thread its own.
+    """
+    iteration_count = 0
+    with span("agent_loop", fmt=fmt, asynchronous=True):
+        while max_iterations is None or iteration_count < max_iterations:
+            iteration_count += 1
+            with span("turn", turn=iteration_count):
+                # Get the client
+                with span("client"):
+                    baml_client = get_baml_async_client()
+                
+                # Serialize the thread and call the agent
+                thread_str = serialize_for_model(thread, fmt, compactor)
+                if prefetcher is not None:
+                    with span("prefetch"):
+                        prefetcher.start(thread)
+                with span("llm", function="DetermineNextStep"):
+                    if next_step is not None:
+                        result, early = await next_step(baml_client, thread_str)
+                    else:
+                        result, early = await baml_client.DetermineNextStep(thread_str), None
+                
+                action, value = next_action(result)
+                running = [source for source in (prefetcher, early) if source is not None]
+                if action != "tools":
+                    for source in running:
+                        source.discard()
+                if action in ("done", "error"):
+                    return value
+                
+                if action == "ignore":
+                    log(f"⚠️ Ignoring unknown intent: {value}")
+                elif action == "clarify":
+                    clarification = clarification_handler(value)
+                    if inspect.isawaitable(clarification):
+                        clarification = await clarification
+                    record_clarification(thread, value, clarification)
+                else:
+                    # independent calls from one round trip run concurrently, and are
+                    # recorded in the order the model asked for them
+                    with span("tool", intent=result.intent, calls=len(value), running=len(running)):
+                        result_values = await async_run_tool_calls(value, running)
+                    record_tool_results(thread, value, result_values, blobs)
+    
+    if prefetcher is not None:
+        prefetcher.discard()
+    return f"Agent reached maximum iterations ({max_iterations}) without completing the task."
+
+async def run_threads(threads, clarification_handler, concurrency=10, max_iterations=5, fmt="xml", compactor=None,
+                      blobs=None, next_step=None):
+    """Run many threads through async_agent_loop, at most `concurrency` at a time.
+    
+    Returns one result per thread, in order. A thread that raises gets its
+    exception in its slot instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_one(thread):
+        async with semaphore:
+            return await async_agent_loop(
+                thread, clarification_handler, fmt=fmt, max_iterations=max_iterations, compactor=compactor,
+                blobs=blobs, next_step=next_step,
+            )
+    
+    return await asyncio.gather(*(run_one(thread) for thread in threads), return_exceptions=True)
@@ -0,0 +1,15 @@
+async def main(messages=("hello from the notebook!",), stream=False, concurrency=10):
+    # Function to handle clarification requests
+    def handle_clarification(question):
+        return get_human_input(f"The agent needs clarification: {question}")
+    
+    # One thread per message, all sharing the async client
+    threads = [Thread([{"type": "user_input", "data": message}]) for message in messages]
+    
+    print(f"🚀 Starting {len(threads)} agents, at most {concurrency} at a time")
+    next_step = async_stream_next_step if stream else None
+    results = await run_threads(threads, handle_clarification, concurrency=concurrency, next_step=next_step)
+    
+    # Print each thread's final response
+    for message, result in zip(messages, results):
+        print(f"\n✅ '{message}': {result}")
@@ -0,0 +1,22 @@
+def main(message="hello from the notebook!", stream=False, prefetch=False):
+    # Function to handle clarification requests
+    def handle_clarification(question):
+        return get_human_input(f"The agent needs clarification: {question}")
+    
+    # Create a new thread with the user's message
+    thread = Thread([{"type": "user_input", "data": message}])
+    
+    print(f"🚀 Starting agent with message: '{message}'")
+    if stream:
+        print("📡 Streaming the model's responses")
+    prefetcher = Prefetcher([calculator_prefetch_rule]) if prefetch else None
+    
+    next_step = stream_next_step if stream else None
+    result = agent_loop(thread, handle_clarification, next_step=next_step, prefetcher=prefetcher)
+    
+    # Print the final response
+    print(f"\n✅ Final response: {result}")
+    if stream:
+        print(f"📊 Early tool starts: {stream_stats()}")
+    if prefetcher is not None:
+        print(f"📊 Prefetch: {prefetcher.stats()}")
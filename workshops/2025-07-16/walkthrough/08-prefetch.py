@@ -0,0 +1,124 @@
+# Speculative pre-fetch (appendix 13): before each DetermineNextStep, rules
+# look at the latest event and start the tool calls the model is likely to
+# ask for, so they run while the model is thinking
+#
+#   prefetcher = Prefetcher([calculator_prefetch_rule])
+#   agent_loop(thread, handle_clarification, prefetcher=prefetcher)
+#   prefetcher.stats()
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+# rules used by a Prefetcher created without its own list
+PREFETCH_RULES = []
+
+def register_prefetch_rule(rule):
+    """Decorator for rule(latest_event, thread) -> iterable of candidate steps (intent + args)."""
+    PREFETCH_RULES.append(rule)
+    return rule
+
+class Prefetcher:
+    """Starts candidate tool calls on a worker pool and hands them to the loop if the model asks.
+
+    Only pure tools without a timeout are started: a guess the model doesn't
+    take is thrown away, and that has to be harmless. Guesses run the handler
+    directly, so tool_stats() only counts the ones the loop used; wasted
+    work shows up in stats() here, where wasted_ratio is the share of
+    started calls nobody used.
+    """
+    def __init__(self, rules=None, executor=None, max_candidates=4):
+        self.rules = PREFETCH_RULES if rules is None else rules
+        self.executor = executor
+        self.max_candidates = max_candidates
+        self._pending = {}
+        self.started = 0
+        self.used = 0
+        self.wasted = 0
+        self.wasted_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _run(self, tool, step, elapsed):
+        start = time.perf_counter()
+        try:
+            return tool.handler(step)
+        finally:
+            elapsed.append(time.perf_counter() - start)
+
+    def start(self, thread):
+        """Run the rules against the latest event and start their candidates."""
+        self.discard()
+        if not thread.events:
+            return
+        latest = thread.events[-1]
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(thread_name_prefix="tool-prefetch")
+        for rule in self.rules:
+            for step in rule(latest, thread) or ():
+                tool = TOOLS.get(step.intent)
+                if tool is None or not tool.pure or tool.timeout is not None:
+                    continue
+                if len(self._pending) >= self.max_candidates:
+                    return
+                key = ToolResultCache.key(step)
+                if key not in self._pending:
+                    with self._lock:
+                        self.started += 1
+                    elapsed = []
+                    self._pending[key] = (tool, self.executor.submit(self._run, tool, step, elapsed), elapsed)
+
+    def take(self, next_step):
+        """The future running next_step if it was pre-fetched, else None."""
+        entry = self._pending.pop(ToolResultCache.key(next_step), None)
+        if entry is None:
+            return None
+        tool, future, elapsed = entry
+        with self._lock:
+            self.used += 1
+        # a used guess stands in for the tool call, so it counts in tool_stats()
+        future.add_done_callback(lambda _: _record_call(tool, elapsed[0]))
+        return future
+
+    def discard(self):
+        """Drop every candidate the model didn't ask for."""
+        pending, self._pending = self._pending, {}
+        for _, future, elapsed in pending.values():
+            with self._lock:
+                self.wasted += 1
+            if not future.cancel():
+                future.add_done_callback(lambda _, elapsed=elapsed: self._count_wasted_time(elapsed))
+
+    def _count_wasted_time(self, elapsed):
+        with self._lock:
+            self.wasted_seconds += elapsed[0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "used": self.used,
+                "wasted": self.wasted,
+                "wasted_ratio": self.wasted / self.started if self.started else 0.0,
+                "wasted_seconds": self.wasted_seconds,
+            }
+
+_CALCULATOR_REQUEST = re.compile(
+    r"\b(add|subtract|multiply|divide)\s+(-?\d+(?:\.\d+)?)\s+(and|by|from|to)\s+(-?\d+(?:\.\d+)?)", re.IGNORECASE
+)
+
+def _number(text):
+    return float(text) if "." in text else int(text)
+
+def calculator_prefetch_rule(latest, thread):
+    """"multiply 3 and 4" in the latest user message -> multiply(a=3, b=4)."""
+    if latest["type"] not in ("user_input", "clarification_response") or not isinstance(latest["data"], str):
+        return []
+    steps = []
+    for op, a, connector, b in _CALCULATOR_REQUEST.findall(latest["data"]):
+        a, b = _number(a), _number(b)
+        if op.lower() == "subtract" and connector.lower() == "from":
+            # "subtract 3 from 10" is 10 - 3
+            a, b = b, a
+        steps.append(SimpleNamespace(intent=op.lower(), a=a, b=b))
+    return steps
@@ -0,0 +1,135 @@
+# Streaming DetermineNextStep: start a tool as soon as the model has finished
+# writing its arguments, while the rest of the response is still streaming
+#
+#   agent_loop(thread, handle_clarification, next_step=stream_next_step)
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+_early_pool = None
+
+# how often early dispatch paid off, see stream_stats()
+_stream_stats = {"streams": 0, "early_dispatches": 0, "early_used": 0, "early_discarded": 0}
+_stream_stats_lock = threading.Lock()
+
+def _count(stat):
+    with _stream_stats_lock:
+        _stream_stats[stat] += 1
+
+def _step_args(step):
+    return {k: v for k, v in step.__dict__.items() if k != "intent"}
+
+class EarlyDispatch:
+    """A tool call started from a partial response, before the final parse.
+
+    The loop hands it each call the model asked for through take(), and
+    discard()s it once the turn's calls are settled. Like the prefetcher's
+    guesses, it runs the handler directly, so it only counts in tool_stats()
+    once the loop uses it.
+    """
+    def __init__(self, tool, args, future, elapsed):
+        self.tool = tool
+        self.intent = tool.intent
+        self.args = args
+        self.future = future
+        self.elapsed = elapsed
+        self.taken = False
+
+    def matches(self, step):
+        return getattr(step, "intent", None) == self.intent and _step_args(step) == self.args
+
+    def take(self, step):
+        """The future running step if it's the call started early, else None."""
+        if self.taken or not self.matches(step):
+            return None
+        self.taken = True
+        _count("early_used")
+        self.future.add_done_callback(lambda _: _record_call(self.tool, self.elapsed[0]))
+        return self.future
+
+    def discard(self):
+        """Drop the early call if the model didn't ask for it."""
+        if self.taken:
+            return
+        self.taken = True
+        # a pure tool that already ran has nothing to undo; its result is just dropped
+        self.future.cancel()
+        _count("early_discarded")
+
+def _ready_tool_call(partial, previous):
+    """(intent, args) once a partial names a pure tool and its arguments are final.
+
+    A partial value may still be growing (a number mid-token), so arguments
+    only count as final once a later partial repeats them unchanged. Only pure
+    tools without a timeout are started early, since a discarded call must
+    have no side effects and nothing to wait out.
+    """
+    intent = getattr(partial, "intent", None)
+    tool = TOOLS.get(intent)
+    if tool is None or not tool.pure or tool.timeout is not None or previous is None:
+        return None
+    args = _step_args(partial)
+    if not args or any(value is None for value in args.values()):
+        return None
+    if getattr(previous, "intent", None) != intent or _step_args(previous) != args:
+        return None
+    return intent, args
+
+def _early_executor():
+    global _early_pool
+    if _early_pool is None:
+        _early_pool = ThreadPoolExecutor(thread_name_prefix="tool-early")
+    return _early_pool
+
+def _run_early(tool, step, elapsed):
+    start = time.perf_counter()
+    try:
+        return tool.handler(step)
+    finally:
+        elapsed.append(time.perf_counter() - start)
+
+def _dispatch_early(partial, previous):
+    """Start the tool call a partial response has finished writing, if there is one."""
+    ready = _ready_tool_call(partial, previous)
+    if ready is None:
+        return None
+    intent, args = ready
+    tool = TOOLS[intent]
+    elapsed = []
+    future = _early_executor().submit(_run_early, tool, SimpleNamespace(intent=intent, **args), elapsed)
+    _count("early_dispatches")
+    return EarlyDispatch(tool, args, future, elapsed)
+
+def stream_next_step(baml_client, thread_str):
+    """DetermineNextStep through BAML's streaming client.
+
+    Returns (final result, EarlyDispatch or None), the shape agent_loop's
+    next_step hook expects. The loop only uses the early call if the final
+    parse asks for exactly that call; otherwise it's discarded.
+    """
+    _count("streams")
+    stream = baml_client.stream.DetermineNextStep(thread_str)
+    early = previous = None
+    for partial in stream:
+        if early is None:
+            early = _dispatch_early(partial, previous)
+        previous = partial
+    result = stream.get_final_response()
+    return result, early
+
+async def async_stream_next_step(baml_client, thread_str):
+    """stream_next_step for the BAML async client (see 08-async-agent.py)."""
+    _count("streams")
+    stream = baml_client.stream.DetermineNextStep(thread_str)
+    early = previous = None
+    async for partial in stream:
+        if early is None:
+            early = _dispatch_early(partial, previous)
+        previous = partial
+    result = await stream.get_final_response()
+    return result, early
+
+def stream_stats():
+    with _stream_stats_lock:
+        return dict(_stream_stats)
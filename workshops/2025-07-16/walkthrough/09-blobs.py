@@ -0,0 +1,149 @@
+# Content-addressed storage for large tool payloads. Events keep a small
+# reference with a preview, so big results aren't copied into every
+# serialization of the thread or every stored copy of it:
+#
+#   blobs = BlobStore("blobs")
+#   agent_loop(thread, handle_clarification, blobs=blobs)  # tool results over the threshold become refs
+#   register_inlined_formats(blobs)                         # thread.serialize("xml+blobs") has full bodies
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+BLOB_KEY = "$blob"
+
+def is_blob_ref(value):
+    return isinstance(value, dict) and BLOB_KEY in value
+
+class BlobStore:
+    """Payloads stored once per sha256 under root/, read back through mmap.
+
+    Strings are stored as UTF-8 text, anything else as JSON. Payloads whose
+    encoded size is under `threshold` bytes stay inline in their events.
+    """
+    def __init__(self, root="blobs", threshold=4096, preview_chars=200, max_open=64):
+        self.root = root
+        self.threshold = threshold
+        self.preview_chars = preview_chars
+        self.max_open = max_open
+        os.makedirs(root, exist_ok=True)
+        # digest -> open mmap, so repeated loads of a hot blob skip open()/mmap()
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, str):
+            return "text", value
+        return "json", json.dumps(value, separators=(",", ":"))
+
+    def put(self, value):
+        """Store value (deduplicated) and return a reference to it."""
+        return self._put(*self._encode(value))
+
+    def _put(self, kind, text):
+        payload = text.encode("utf-8")
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write then rename, so a reader never maps a half-written blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        preview = text[:self.preview_chars] + ("…" if len(text) > self.preview_chars else "")
+        return {BLOB_KEY: digest, "kind": kind, "bytes": len(payload), "preview": preview}
+
+    def open(self, digest):
+        """A read-only mmap of a blob's bytes, for reading slices of big payloads; close it when done."""
+        with open(self._path(digest), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _mapped(self, digest):
+        """Cached mmap of a blob; only use it while holding self._lock."""
+        mm = self._maps.get(digest)
+        if mm is not None:
+            self._maps.move_to_end(digest)
+            return mm
+        mm = self.open(digest)
+        self._maps[digest] = mm
+        while len(self._maps) > self.max_open:
+            self._maps.popitem(last=False)[1].close()
+        return mm
+
+    def load(self, ref):
+        """The original value behind a reference."""
+        if ref["bytes"] == 0:
+            text = ""
+        else:
+            with self._lock:
+                with memoryview(self._mapped(ref[BLOB_KEY])) as view:
+                    text = str(view, "utf-8")
+        return text if ref["kind"] == "text" else json.loads(text)
+
+    def maybe_put(self, value):
+        """A reference if value is big enough to move out of the event, else value unchanged."""
+        if value is None or isinstance(value, (bool, int, float)) or is_blob_ref(value):
+            return value
+        kind, text = self._encode(value)
+        # len(text) <= UTF-8 size, so most small payloads never get encoded to bytes
+        if len(text) < self.threshold and len(text.encode("utf-8")) < self.threshold:
+            return value
+        return self._put(kind, text)
+
+    def externalize(self, event):
+        """Event with large payloads replaced by references.
+
+        For dict data (e.g. tool_call's {"tool", "operation", "result"}) each
+        field is checked on its own, so the small fields the serializers rely
+        on stay inline.
+        """
+        data = event["data"]
+        if isinstance(data, dict):
+            new_data = {key: self.maybe_put(value) for key, value in data.items()}
+            if all(new_data[key] is data[key] for key in data):
+                return event
+        else:
+            new_data = self.maybe_put(data)
+            if new_data is data:
+                return event
+        return {**event, "data": new_data}
+
+    def inline(self, event):
+        """Event with every reference replaced by the full payload."""
+        data = event["data"]
+        if is_blob_ref(data):
+            return {**event, "data": self.load(data)}
+        if isinstance(data, dict) and any(is_blob_ref(value) for value in data.values()):
+            return {**event, "data": {key: self.load(value) if is_blob_ref(value) else value for key, value in data.items()}}
+        return event
+
+    def close(self):
+        with self._lock:
+            for mm in self._maps.values():
+                mm.close()
+            self._maps.clear()
+
+def register_inlined_formats(store, formats=None, suffix="+blobs"):
+    """Register "<fmt>+blobs" for each format in SERIALIZERS (or just `formats`):
+    the same encoding, with blob references inlined first.
+
+    The plain formats keep rendering the reference and its preview.
+    """
+    for name in list(formats or SERIALIZERS):
+        if name.endswith(suffix):
+            continue
+        serializer = SERIALIZERS[name]
+        register_serializer(
+            name + suffix,
+            lambda event, encode=serializer.encode_event: encode(store.inline(event)),
+            serializer.separator,
+            serializer.wrap,
+        )
@@ -0,0 +1,16 @@
+def main(message="hello from the notebook!", runs=2):
+    # Function to handle clarification requests
+    def handle_clarification(question):
+        return get_human_input(f"The agent needs clarification: {question}")
+    
+    cache = enable_response_cache()
+    try:
+        for run in range(1, runs + 1):
+            # Same message, same thread: after the first run the model's answers come from disk
+            thread = Thread([{"type": "user_input", "data": message}])
+            print(f"🚀 Run {run} with message: '{message}'")
+            result = agent_loop(thread, handle_clarification)
+            print(f"✅ Final response: {result}\n")
+        print(f"📊 Response cache: {cache.stats()}")
+    finally:
+        disable_response_cache()
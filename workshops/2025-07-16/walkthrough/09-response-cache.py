@@ -0,0 +1,289 @@
+# Opt-in disk cache for DetermineNextStep responses. Retries, tests and
+# re-running main() often send the exact same thread; with the cache on,
+# those come back from disk instead of from the model:
+#
+#   cache = enable_response_cache(ttl=24 * 3600, max_bytes=50_000_000)
+#   main("can you multiply 3 and 4")
+#   cache.stats()
+#
+# Streamed calls (stream_next_step) bypass the cache.
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+RESPONSE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    function TEXT NOT NULL,
+    class TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+def to_jsonable(value):
+    """Turn a BAML result (pydantic models, possibly nested) into plain JSON data."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    if hasattr(value, "__dict__"):
+        return {k: to_jsonable(v) for k, v in vars(value).items()}
+    return value
+
+def to_namespace(value):
+    """Rebuild attribute access (result.intent, result.calls[0].a) from JSON data."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(v) for v in value]
+    return value
+
+def from_jsonable(class_name, value, types=None):
+    """A result saved with to_jsonable, as types.<class_name> if types has it, else as SimpleNamespace."""
+    cls = getattr(types, class_name, None) if types is not None else None
+    if cls is not None and hasattr(cls, "model_validate"):
+        return cls.model_validate(value)
+    return to_namespace(value)
+
+class ClientWrapper:
+    """Wraps a BAML client so calls to `functions` (None for all of them) go through hooks.
+
+    Subclasses fill in _key, _lookup (answer a call without the client) and
+    _save (keep a result the client returned). client.stream is handed to
+    _wrap_streams, which passes it through unchanged by default.
+    """
+    def __init__(self, client, functions=None):
+        self._client = client
+        self._functions = functions
+
+    def _key(self, function, args, kwargs):
+        return None
+
+    def _lookup(self, key):
+        """(True, result) to answer the call without the client, else (False, None)."""
+        return False, None
+
+    def _save(self, key, function, args, kwargs, result, latency):
+        pass
+
+    def _wrap_streams(self, streams):
+        return streams
+
+    def __getattr__(self, function):
+        method = getattr(self._client, function)
+        if function == "stream":
+            return self._wrap_streams(method)
+        if self._functions is not None and function not in self._functions:
+            return method
+        return self._wrap(function, method)
+
+    def _wrap(self, function, method):
+        def call(*args, **kwargs):
+            key = self._key(function, args, kwargs)
+            hit, result = self._lookup(key)
+            if hit:
+                return result
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            self._save(key, function, args, kwargs, result, time.perf_counter() - start)
+            return result
+        return call
+
+class AsyncClientWrapper(ClientWrapper):
+    """ClientWrapper for the async client."""
+    def _wrap(self, function, method):
+        async def call(*args, **kwargs):
+            key = self._key(function, args, kwargs)
+            hit, result = self._lookup(key)
+            if hit:
+                return result
+            start = time.perf_counter()
+            result = await method(*args, **kwargs)
+            self._save(key, function, args, kwargs, result, time.perf_counter() - start)
+            return result
+        return call
+
+class ResponseCache:
+    """SQLite-backed response cache with a TTL and a size cap (least recently used goes first).
+
+    Keys hash the function name, `config` (the .baml sources, so editing a
+    prompt or switching models starts a fresh cache) and the call's arguments.
+    """
+    def __init__(self, path="response_cache.db", ttl=None, max_bytes=100_000_000, config=""):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(RESPONSE_CACHE_SCHEMA)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def key(self, function, args, kwargs):
+        payload = json.dumps([function, self.config, list(args), kwargs], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return (class name, value) for a live entry, or None."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT class, value, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[3] > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[2]
+            return row[0], json.loads(row[1])
+
+    def put(self, key, function, result, latency):
+        value = json.dumps(to_jsonable(result))
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, function, class, value, size, latency, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, function, type(result).__name__, value, len(value), latency, now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        if self.ttl is not None:
+            cursor = self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self.expired += cursor.rowcount
+        if self.max_bytes is None:
+            return
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def close(self):
+        self.conn.close()
+
+class CachedClient(ClientWrapper):
+    """Wraps a BAML client so calls to `functions` go through a ResponseCache.
+    
+    Streamed calls (client.stream.*, see 08-streaming.py) bypass the cache and
+    always go to the model: the cache stores final responses, not the
+    partials a stream yields.
+    """
+    def __init__(self, client, cache, functions=("DetermineNextStep",), types=None):
+        super().__init__(client, functions)
+        self._cache = cache
+        self._types = types
+
+    def _key(self, function, args, kwargs):
+        return self._cache.key(function, args, kwargs)
+
+    def _lookup(self, key):
+        cached = self._cache.get(key)
+        if cached is None:
+            return False, None
+        return True, from_jsonable(*cached, self._types)
+
+    def _save(self, key, function, args, kwargs, result, latency):
+        self._cache.put(key, function, result, latency)
+
+class AsyncCachedClient(AsyncClientWrapper, CachedClient):
+    """CachedClient for the async client."""
+
+def _baml_types():
+    """The generated baml_client.types module, if it's loaded, so cached results keep their classes."""
+    return sys.modules.get("baml_client.types")
+
+def _baml_config():
+    """Hash of the .baml sources the live client was generated from (see the setup cell)."""
+    loader_cache = globals().get("_baml_client_cache")
+    return (loader_cache or {}).get("loaded_hash") or ""
+
+def enable_response_cache(path="response_cache.db", ttl=None, max_bytes=100_000_000, functions=("DetermineNextStep",)):
+    """Route get_baml_client() (and get_baml_async_client()) through a response cache.
+
+    Returns the ResponseCache; call disable_response_cache() to go back to
+    the live client.
+    """
+    global get_baml_client, get_baml_async_client
+    disable_response_cache()
+    cache = ResponseCache(path, ttl=ttl, max_bytes=max_bytes)
+    live_client = get_baml_client
+    live_async_client = globals().get("get_baml_async_client")
+
+    def cached_get_baml_client():
+        client = live_client()
+        # the key follows the .baml sources the client came from, client config included
+        cache.config = _baml_config()
+        return CachedClient(client, cache, functions, _baml_types())
+    cached_get_baml_client.live = live_client
+    cached_get_baml_client.cache = cache
+    get_baml_client = cached_get_baml_client
+
+    if live_async_client is not None:
+        def cached_get_baml_async_client():
+            client = live_async_client()
+            cache.config = _baml_config()
+            return AsyncCachedClient(client, cache, functions, _baml_types())
+        cached_get_baml_async_client.live = live_async_client
+        get_baml_async_client = cached_get_baml_async_client
+    return cache
+
+def disable_response_cache():
+    global get_baml_client, get_baml_async_client
+    cache = getattr(globals().get("get_baml_client"), "cache", None)
+    if cache is None:
+        return
+    get_baml_client = get_baml_client.live
+    if hasattr(globals().get("get_baml_async_client"), "live"):
+        get_baml_async_client = get_baml_async_client.live
+    cache.close()
@@ -0,0 +1,21 @@
+def main(message="hello from the notebook!", db="threads.db"):
+    # Function to handle clarification requests
+    def handle_clarification(question):
+        return get_human_input(f"The agent needs clarification: {question}")
+    
+    # Run the agent, then save the finished thread
+    thread = Thread([{"type": "user_input", "data": message}])
+    print(f"🚀 Starting agent with message: '{message}'")
+    result = agent_loop(thread, handle_clarification)
+    print(f"\n✅ Final response: {result}")
+    
+    with ThreadStore(db, reducer=thread_reducer()) as store:
+        thread_id = store.create(thread)
+    print(f"💾 Saved thread {thread_id} ({len(thread.events)} events)")
+    
+    # A new store on the same file stands in for a restarted process
+    with ThreadStore(db, reducer=thread_reducer()) as store:
+        state = store.resume(thread_id)
+        resumed = Thread(state_to_events(state))
+    print(f"🔁 Resumed {state['count']} events, awaiting human: {state['awaiting_human']}")
+    print(resumed.serialize("xml"))
@@ -0,0 +1,326 @@
+# ThreadStore backed by SQLite, so paused threads survive a restart
+# (factor 6 - launch/pause/resume). Every event is its own row: appending
+# to a thread writes one row instead of rewriting the whole thread.
+#
+# With a reducer (factor 12 - stateless reducer), the store also folds each
+# thread's events into a compact state and snapshots it every N events, so
+# resume() costs one snapshot read plus at most N events, however long the
+# thread gets.
+import copy
+import json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (thread_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (thread_id, seq)
+) WITHOUT ROWID;
+"""
+
+def thread_reducer(window=50):
+    """Reducer (state, event) -> state that keeps what the agent needs to pick a thread back up.
+    
+    The state is the thread's first event (the original ask), its last
+    `window` events, and running counts; see state_to_events(). Like any
+    reducer used with ThreadStore, it returns JSON-serializable state and may
+    update the state it's given in place.
+    """
+    def reduce(state, event):
+        if state is None:
+            state = {"count": 0, "first": event, "recent": [], "types": {}, "last_result": None}
+        state["count"] += 1
+        state["types"][event["type"]] = state["types"].get(event["type"], 0) + 1
+        if state["count"] > 1:
+            state["recent"].append(event)
+            if len(state["recent"]) > window:
+                del state["recent"][0]
+        if event["type"] == "tool_call" and isinstance(event["data"], dict):
+            state["last_result"] = event["data"].get("result")
+        state["awaiting_human"] = event["type"] == "clarification_request"
+        return state
+    return reduce
+
+def state_to_events(state):
+    """Events to rebuild a Thread from a thread_reducer state, with a compacted
+    marker (as in 07-compaction.py) standing in for what the window dropped."""
+    if state is None:
+        return []
+    omitted = state["count"] - 1 - len(state["recent"])
+    marker = [{"type": "compacted", "data": f"{omitted} earlier events omitted"}] if omitted else []
+    return [state["first"], *marker, *state["recent"]]
+
+def reduce_events(reducer, events, state=None):
+    for event in events:
+        state = reducer(state, event)
+    return state
+
+class ThreadStore:
+    """Same create/get/update surface as the TypeScript ThreadStore in 09-state.ts.
+    
+    Writes are committed every `batch_size` operations (call flush() to force
+    it), and up to `cache_size` recently used threads are kept in memory.
+    
+    With a `reducer`, every write also folds the new events into that thread's
+    state, and a snapshot of it is stored once `snapshot_every` events have
+    been added since the last one; see resume().
+    """
+    def __init__(self, path="threads.db", batch_size=1, cache_size=128, thread_factory=None,
+                 reducer=None, snapshot_every=1000):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        # builds a thread from its events; defaults to the Thread class from 07-thread.py
+        self.thread_factory = thread_factory or (lambda events: Thread(events))
+        self._pending = 0
+        self._cache = OrderedDict()
+        self._next_seq = {}
+        self.reducer = reducer
+        self.snapshot_every = snapshot_every
+        # thread_id -> [state, seq it covers up to, seq of the last snapshot]
+        self._states = OrderedDict()
+        self._lock = threading.RLock()
+    
+    def create(self, thread):
+        thread_id = str(uuid.uuid4())
+        with self._lock:
+            self.conn.execute("INSERT INTO threads (id, created_at) VALUES (?, ?)", (thread_id, time.time()))
+            self._insert_events(thread_id, 0, thread.events)
+            self._next_seq[thread_id] = len(thread.events)
+            self._cache_put(thread_id, thread)
+            self._advance(thread_id, 0, thread.events)
+            self._wrote()
+        return thread_id
+    
+    def get(self, thread_id):
+        """Return the thread, or None if there is no thread with this id."""
+        with self._lock:
+            if thread_id in self._cache:
+                self._cache.move_to_end(thread_id)
+                return self._cache[thread_id]
+            if not self.exists(thread_id):
+                return None
+            thread = self.thread_factory(self.get_events(thread_id))
+            self._next_seq[thread_id] = len(thread.events)
+            self._cache_put(thread_id, thread)
+            return thread
+    
+    def update(self, thread_id, thread):
+        """Persist thread. Events past what's already stored are appended;
+        a thread with fewer events than stored is rewritten from scratch."""
+        with self._lock:
+            stored = self._seq(thread_id)
+            if len(thread.events) < stored:
+                self.conn.execute("DELETE FROM events WHERE thread_id = ?", (thread_id,))
+                self.conn.execute("DELETE FROM snapshots WHERE thread_id = ?", (thread_id,))
+                self._states.pop(thread_id, None)
+                stored = 0
+            self._insert_events(thread_id, stored, thread.events[stored:])
+            self._next_seq[thread_id] = len(thread.events)
+            self._cache_put(thread_id, thread)
+            self._advance(thread_id, stored, thread.events[stored:])
+            self._wrote()
+    
+    def append_event(self, thread_id, event):
+        """Append one event to a stored thread (one INSERT)."""
+        with self._lock:
+            seq = self._seq(thread_id)
+            self._insert_events(thread_id, seq, [event])
+            self._next_seq[thread_id] = seq + 1
+            thread = self._cache.get(thread_id)
+            if thread is not None and len(thread.events) == seq:
+                thread.add_event(event)
+            self._advance(thread_id, seq, [event])
+            self._wrote()
+    
+    def get_events(self, thread_id, start=0, limit=None):
+        """Load events [start, start + limit) without building the whole thread."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT type, data FROM events WHERE thread_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (thread_id, start, -1 if limit is None else limit),
+            )
+            return [{"type": event_type, "data": json.loads(data)} for event_type, data in rows]
+    
+    def resume(self, thread_id):
+        """Return a copy of the reduced state of a stored thread.
+        
+        Loads the latest snapshot and replays only the events stored after
+        it. thread_factory(state_to_events(state)) gives a Thread to continue
+        with, when using thread_reducer(). The store keeps folding new events
+        into its own state, so changing the returned one doesn't affect it.
+        """
+        if self.reducer is None:
+            raise ValueError("resume() needs a ThreadStore created with a reducer")
+        with self._lock:
+            entry = self._states.get(thread_id)
+            if entry is None or entry[1] != self._seq(thread_id):
+                entry = self._load_state(thread_id)
+            return copy.deepcopy(entry[0])
+    
+    def snapshot(self, thread_id):
+        """Store a snapshot of the thread's current state now."""
+        with self._lock:
+            self.resume(thread_id)
+            self._write_snapshot(thread_id, self._states[thread_id])
+            self._wrote()
+    
+    def exists(self, thread_id):
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM threads WHERE id = ?", (thread_id,)).fetchone()
+            return row is not None
+    
+    def flush(self):
+        """Commit any batched writes."""
+        with self._lock:
+            self.conn.commit()
+            self._pending = 0
+    
+    def close(self):
+        self.flush()
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _seq(self, thread_id):
+        """Next sequence number for thread_id."""
+        if thread_id not in self._next_seq:
+            if not self.exists(thread_id):
+                raise KeyError(f"Unknown thread: {thread_id}")
+            row = self.conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM events WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+            self._next_seq[thread_id] = row[0]
+        return self._next_seq[thread_id]
+    
+    def _insert_events(self, thread_id, first_seq, events):
+        self.conn.executemany(
+            "INSERT INTO events (thread_id, seq, type, data) VALUES (?, ?, ?, ?)",
+            [(thread_id, first_seq + i, e["type"], json.dumps(e["data"])) for i, e in enumerate(events)],
+        )
+    
+    def _load_state(self, thread_id):
+        """Latest snapshot plus the events after it."""
+        row = self.conn.execute(
+            "SELECT seq, state FROM snapshots WHERE thread_id = ? ORDER BY seq DESC LIMIT 1", (thread_id,)
+        ).fetchone()
+        snapshot_seq, state = (row[0], json.loads(row[1])) if row else (0, None)
+        events = self.get_events(thread_id, start=snapshot_seq)
+        entry = [reduce_events(self.reducer, events, state), snapshot_seq + len(events), snapshot_seq]
+        self._state_put(thread_id, entry)
+        return entry
+    
+    def _advance(self, thread_id, first_seq, events):
+        """Fold newly written events into the thread's state, snapshotting every snapshot_every events."""
+        if self.reducer is None:
+            return
+        entry = self._states.get(thread_id)
+        if entry is not None and entry[1] == first_seq:
+            entry[0] = reduce_events(self.reducer, events, entry[0])
+            entry[1] += len(events)
+            self._states.move_to_end(thread_id)
+        else:
+            # not in memory (or out of step): the events are already stored, so
+            # loading from the last snapshot picks them up
+            entry = self._load_state(thread_id)
+        if entry[1] - entry[2] >= self.snapshot_every:
+            self._write_snapshot(thread_id, entry)
+    
+    def _write_snapshot(self, thread_id, entry):
+        state, seq = entry[0], entry[1]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO snapshots (thread_id, seq, state) VALUES (?, ?, ?)",
+            (thread_id, seq, json.dumps(state)),
+        )
+        # only the latest snapshot is ever read
+        self.conn.execute("DELETE FROM snapshots WHERE thread_id = ? AND seq < ?", (thread_id, seq))
+        entry[2] = seq
+    
+    def _state_put(self, thread_id, entry):
+        self._states[thread_id] = entry
+        self._states.move_to_end(thread_id)
+        while len(self._states) > self.cache_size:
+            self._states.popitem(last=False)
+    
+    def _cache_put(self, thread_id, thread):
+        self._cache[thread_id] = thread
+        self._cache.move_to_end(thread_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def _wrote(self):
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+class EventLog:
+    """Columnar, append-only event storage for cold threads.
+    
+    Instead of one dict per event, types are kept as small integer codes in an
+    array plus a shared table of interned names, and data payloads in a plain
+    list. Iterating or indexing gives back the usual {"type", "data"} dicts.
+    """
+    def __init__(self, events=()):
+        self._type_names = []
+        self._type_codes = {}
+        self._types = array("H")
+        self._data = []
+        for event in events:
+            self.append(event)
+    
+    @classmethod
+    def from_dicts(cls, events):
+        return cls(events)
+    
+    def to_dicts(self):
+        return list(self)
+    
+    def append(self, event):
+        event_type = event["type"]
+        code = self._type_codes.get(event_type)
+        if code is None:
+            code = len(self._type_names)
+            self._type_names.append(sys.intern(event_type))
+            self._type_codes[event_type] = code
+        self._types.append(code)
+        self._data.append(event["data"])
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __getitem__(self, index):
+        """One event, or a list of them for a slice (so thread.events[n:] works)."""
+        names = self._type_names
+        if isinstance(index, slice):
+            return [{"type": names[code], "data": data} for code, data in zip(self._types[index], self._data[index])]
+        return {"type": names[self._types[index]], "data": self._data[index]}
+    
+    def __iter__(self):
+        names = self._type_names
+        for code, data in zip(self._types, self._data):
+            yield {"type": names[code], "data": data}
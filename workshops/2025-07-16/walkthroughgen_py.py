@@ -6,8 +6,18 @@ import nbformat
 from nbformat.v4 import new_notebook, new_markdown_cell, new_code_cell
 import os
 import sys
+import json
+import hashlib
 from pathlib import Path
 import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when the cache layout changes; edits to this script invalidate it on their own
+CACHE_VERSION = 1
+# The BAML setup cell is a walkthrough file too, so hack/ tools can load it with load_cells
+BAML_SETUP_PATH = Path(__file__).resolve().parent / "walkthrough" / "00-baml-setup.py"
+GENERATOR_HASH = hashlib.sha256(Path(__file__).read_bytes() + BAML_SETUP_PATH.read_bytes()).hexdigest()
 
 def create_baml_setup_cells(nb):
     """Add BAML setup cells with explanation."""
@@ -17,7 +27,8 @@ def create_baml_setup_cells(nb):
 Don't worry too much about this setup code - it will make sense later! For now, just know that:
 - BAML is a tool for working with language models
 - We need some special setup code to make it work nicely in Google Colab
-- The `get_baml_client()` function will be used to interact with AI models"""
+- The `get_baml_client()` function will be used to interact with AI models
+- The client is cached, so it's only regenerated when your `.baml` files change (call `invalidate_baml_client()` to force a rebuild)"""
     nb.cells.append(new_markdown_cell(explanation))
     
     # First cell: Install baml-py and pydantic
@@ -25,58 +36,7 @@ Don't worry too much about this setup code - it will make sense later! For now,
     nb.cells.append(new_code_cell(install_code))
     
     # Second cell: Helper functions
-    setup_code = '''import subprocess
-import os
-
-# Try to import Google Colab userdata, but don't fail if not in Colab
-try:
-    from google.colab import userdata
-    IN_COLAB = True
-except ImportError:
-    IN_COLAB = False
-
-def baml_generate():
-    try:
-        result = subprocess.run(
-            ["baml-cli", "generate"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        if result.stdout:
-            print("[baml-cli generate]\\n", result.stdout)
-        if result.stderr:
-            print("[baml-cli generate]\\n", result.stderr)
-    except subprocess.CalledProcessError as e:
-        msg = (
-            f"`baml-cli generate` failed with exit code {e.returncode}\\n"
-            f"--- STDOUT ---\\n{e.stdout}\\n"
-            f"--- STDERR ---\\n{e.stderr}"
-        )
-        raise RuntimeError(msg) from None
-
-def get_baml_client():
-    """
-    a bunch of fun jank to work around the google colab import cache
-    """
-    # Set API key from Colab secrets or environment
-    if IN_COLAB:
-        os.environ['OPENAI_API_KEY'] = userdata.get('OPENAI_API_KEY')
-    elif 'OPENAI_API_KEY' not in os.environ:
-        print("Warning: OPENAI_API_KEY not set. Please set it in your environment.")
-    
-    baml_generate()
-    
-    # Force delete all baml_client modules from sys.modules
-    import sys
-    modules_to_delete = [key for key in sys.modules.keys() if key.startswith('baml_client')]
-    for module in modules_to_delete:
-        del sys.modules[module]
-    
-    # Now import fresh
-    import baml_client
-    return baml_client.sync_client.b
-'''
+    setup_code = read_source(BAML_SETUP_PATH)
     nb.cells.append(new_code_cell(setup_code))
     
     # Third cell: Initialize BAML
@@ -84,7 +44,26 @@ def get_baml_client():
     nb.cells.append(new_code_cell(init_code))
     
 
-def process_step(nb, step, base_path, current_functions, section_name=None):
+def resolve_src(src, base_path):
+    """Resolve a step's src; paths are relative to the walkthrough YAML."""
+    # Handle relative paths that start with ./
+    if src.startswith('./'):
+        return base_path / src[2:]
+    return base_path / src
+
+def read_source(file_path, file_cache=None):
+    """Read a step's source file, or None if it doesn't exist."""
+    if file_cache is not None and file_path in file_cache:
+        return file_cache[file_path]
+    content = None
+    if file_path.exists():
+        with open(file_path, 'r') as f:
+            content = f.read()
+    if file_cache is not None:
+        file_cache[file_path] = content
+    return content
+
+def process_step(nb, step, base_path, current_functions, section_name=None, file_cache=None):
     """Process different step types."""
     if 'text' in step:
         # Add markdown cell
@@ -98,15 +77,9 @@ def process_step(nb, step, base_path, current_functions, section_name=None):
         src = step['file']['src']
         # For Python files, add the entire file content as a code cell
         if src.endswith('.py'):
-            # Handle relative paths that start with ./
-            if src.startswith('./'):
-                file_path = base_path.parent / src[2:]
-            else:
-                file_path = base_path / src
-            
-            if file_path.exists():
-                with open(file_path, 'r') as f:
-                    content = f.read()
+            file_path = resolve_src(src, base_path)
+            content = read_source(file_path, file_cache)
+            if content is not None:
                 # Add filename as comment at top
                 code_with_header = f"# {src}\n{content}"
                 nb.cells.append(new_code_cell(code_with_header))
@@ -122,6 +95,19 @@ def process_step(nb, step, base_path, current_functions, section_name=None):
         command = f"!curl -fsSL -o {dest} {github_url} && cat {dest}"
         nb.cells.append(new_code_cell(command))
     
+    if 'write_file' in step:
+        # Ship a file from this repo in the notebook itself, for files the
+        # upstream repo doesn't serve (fetch_file would 404)
+        src = step['write_file']['src']
+        dest = step['write_file']['dest']
+        file_path = resolve_src(src, base_path)
+        content = read_source(file_path, file_cache)
+        if content is not None:
+            nb.cells.append(new_code_cell(f"%%writefile {dest}\n{content}"))
+        else:
+            print(f"Warning: File not found: {file_path}")
+            nb.cells.append(new_markdown_cell(f"**Error: File not found: {src}**"))
+    
     if 'dir' in step:
         # Create directory
         path = step['dir']['path']
@@ -164,15 +150,76 @@ def process_step(nb, step, base_path, current_functions, section_name=None):
         else:
             main_call = "main()"
         
+        # An async main is awaited at the top level of the cell
+        if step['run_main'].get('await', False):
+            main_call = f"await {main_call}"
+        
         # Execute the main function call
         nb.cells.append(new_code_cell(main_call))
 
-def convert_walkthrough_to_notebook(yaml_path, output_path):
-    """Convert walkthrough.yaml to Jupyter notebook."""
+def embedded_sources(step):
+    """The srcs whose contents a step copies into the notebook."""
+    if 'file' in step and step['file']['src'].endswith('.py'):
+        return [step['file']['src']]
+    if 'write_file' in step:
+        return [step['write_file']['src']]
+    return []
+
+def section_key(section, base_path, file_cache):
+    """Hash of a section's YAML, the files it pulls in and the generator itself."""
+    digest = hashlib.sha256()
+    digest.update(GENERATOR_HASH.encode())
+    digest.update(json.dumps(section, sort_keys=True, default=str).encode())
+    for step in section.get('steps', []):
+        for src in embedded_sources(step):
+            content = read_source(resolve_src(src, base_path), file_cache)
+            digest.update(b"\0" + (content or "").encode())
+    return digest.hexdigest()
+
+def render_section(section, base_path, current_functions, file_cache):
+    """Return the cells for one section."""
+    nb = new_notebook()
+    
+    # Add section title
+    section_title = section.get('title', section.get('name', 'Section'))
+    section_name = section.get('name', '')
+    nb.cells.append(new_markdown_cell(f"## {section_title}"))
+    
+    # Add section description
+    if 'text' in section:
+        nb.cells.append(new_markdown_cell(section['text']))
+    
+    # Process steps
+    for step in section.get('steps', []):
+        process_step(nb, step, base_path, current_functions, section_name, file_cache)
+    return nb.cells
+
+def load_build_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "notebook_key": None, "sections": {}}
+    if cache.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "notebook_key": None, "sections": {}}
+    return cache
+
+def convert_walkthrough_to_notebook(yaml_path, output_path, incremental=False, cache_path=None, file_cache=None):
+    """Convert walkthrough.yaml to Jupyter notebook.
+    
+    With incremental=True, cells are cached per section (keyed on section_key)
+    in cache_path, only changed sections are re-rendered, and the output isn't
+    rewritten at all when nothing changed. Returns True if the notebook was written.
+    """
     # Load YAML
     with open(yaml_path, 'r') as f:
         walkthrough = yaml.safe_load(f)
     
+    if file_cache is None:
+        file_cache = {}
+    cache_path = cache_path or f"{output_path}.cache.json"
+    cache = load_build_cache(cache_path) if incremental else None
+    
     # Create notebook
     nb = new_notebook()
     
@@ -184,38 +231,176 @@ def convert_walkthrough_to_notebook(yaml_path, output_path):
     if 'text' in walkthrough:
         nb.cells.append(new_markdown_cell(walkthrough['text']))
     
+    header_key = hashlib.sha256(json.dumps([title, walkthrough.get('text')]).encode()).hexdigest()
+    header_len = len(nb.cells)
+    if incremental and cache.get("header_key") == header_key:
+        # reuse the cached header cells so their ids stay stable
+        nb.cells = [nbformat.from_dict(cell) for cell in cache["header"]]
+    
     # Process sections
     base_path = Path(yaml_path).parent
     current_functions = {}
     
+    keys = [header_key]
+    sections_cache = {}
+    rendered = 0
     for section in walkthrough.get('sections', []):
-        # Add section title
-        section_title = section.get('title', section.get('name', 'Section'))
-        section_name = section.get('name', '')
-        nb.cells.append(new_markdown_cell(f"## {section_title}"))
-        
-        # Add section description
-        if 'text' in section:
-            nb.cells.append(new_markdown_cell(section['text']))
+        if not incremental:
+            nb.cells.extend(render_section(section, base_path, current_functions, file_cache))
+            continue
         
-        # Process steps
-        for step in section.get('steps', []):
-            process_step(nb, step, base_path, current_functions, section_name)
+        key = section_key(section, base_path, file_cache)
+        keys.append(key)
+        if key in cache["sections"]:
+            cells = [nbformat.from_dict(cell) for cell in cache["sections"][key]]
+        else:
+            cells = render_section(section, base_path, current_functions, file_cache)
+            rendered += 1
+        sections_cache[key] = cells
+        nb.cells.extend(cells)
+    
+    if incremental:
+        notebook_key = hashlib.sha256("".join(keys).encode()).hexdigest()
+        if cache["notebook_key"] == notebook_key and os.path.exists(output_path):
+            print(f"Up to date: {output_path}")
+            return False
     
     # Write notebook
     with open(output_path, 'w') as f:
         nbformat.write(nb, f)
     
+    if incremental:
+        with open(cache_path, 'w') as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "notebook_key": notebook_key,
+                "header_key": header_key,
+                "header": nb.cells[:header_len],
+                "sections": sections_cache,
+            }, f)
+        print(f"Re-rendered {rendered}/{len(keys) - 1} sections")
+    
     print(f"Generated notebook: {output_path}")
+    return True
+
+def find_walkthroughs(paths):
+    """Expand directories into the walkthrough YAML files under them."""
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(sorted(p for p in path.rglob('walkthrough*.yaml') if 'node_modules' not in p.parts))
+        else:
+            found.append(path)
+    return found
+
+def collect_targets(yaml_paths):
+    """Return [(yaml_path, output_path)] for every ipynb target the YAML files declare.
+    
+    Two walkthroughs writing the same notebook is a ValueError: whichever
+    worker finished last would silently win.
+    """
+    jobs = []
+    outputs = {}
+    for yaml_path in yaml_paths:
+        with open(yaml_path, 'r') as f:
+            walkthrough = yaml.safe_load(f)
+        for target in walkthrough.get('targets') or []:
+            if 'ipynb' not in target:
+                # markdown/final/folders targets are built by the TypeScript walkthroughgen
+                print(f"Skipping non-ipynb target in {yaml_path}: {sorted(target)}")
+                continue
+            output_path = resolve_src(target['ipynb'], yaml_path.parent)
+            key = output_path.resolve()
+            if key in outputs:
+                raise ValueError(f"{output_path} is a target of both {outputs[key]} and {yaml_path}")
+            outputs[key] = yaml_path
+            jobs.append((yaml_path, output_path))
+    return jobs
+
+def preload_sources(yaml_paths):
+    """Read every file the walkthroughs copy into notebooks once, to share with the workers."""
+    file_cache = {}
+    for yaml_path in yaml_paths:
+        with open(yaml_path, 'r') as f:
+            walkthrough = yaml.safe_load(f)
+        for section in walkthrough.get('sections', []):
+            for step in section.get('steps', []):
+                for src in embedded_sources(step):
+                    read_source(resolve_src(src, yaml_path.parent), file_cache)
+    return file_cache
+
+# read-only copy of preload_sources() in each worker process
+_shared_sources = None
+
+def _init_worker(file_cache):
+    global _shared_sources
+    _shared_sources = file_cache
+
+def _build_target(yaml_path, output_path, incremental):
+    start = time.perf_counter()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # each build gets its own copy so reads of unlisted files don't leak between jobs
+    written = convert_walkthrough_to_notebook(
+        yaml_path, output_path, incremental=incremental, file_cache=dict(_shared_sources or {})
+    )
+    return written, time.perf_counter() - start
+
+def build_all(paths, incremental=False, jobs=None):
+    """Build every ipynb target declared by the given walkthrough files/directories in parallel."""
+    yaml_paths = find_walkthroughs(paths)
+    targets = collect_targets(yaml_paths)
+    if not targets:
+        print("No ipynb targets found")
+        return []
+    
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(preload_sources(yaml_paths),)) as pool:
+        futures = [(yaml_path, output_path, pool.submit(_build_target, yaml_path, output_path, incremental))
+                   for yaml_path, output_path in targets]
+        results = []
+        for yaml_path, output_path, future in futures:
+            try:
+                written, seconds = future.result()
+                status = "built" if written else "up to date"
+            except Exception as e:
+                seconds, status = 0.0, f"failed: {e}"
+            results.append((yaml_path, output_path, status, seconds))
+    
+    print("\nTarget timings:")
+    for yaml_path, output_path, status, seconds in results:
+        print(f"  {seconds * 1000:8.1f} ms  {status:<12} {output_path}  ({yaml_path})")
+    print(f"Built {len(results)} targets in {time.perf_counter() - start:.2f}s")
+    return results
 
 def main():
     parser = argparse.ArgumentParser(description='Convert walkthrough.yaml to Jupyter notebook')
-    parser.add_argument('yaml_file', help='Path to walkthrough.yaml')
-    parser.add_argument('-o', '--output', default='output.ipynb', help='Output notebook file')
+    parser.add_argument('yaml_file', nargs='+',
+                        help='Path to walkthrough.yaml; several files or directories build every declared target')
+    parser.add_argument('-o', '--output', help='Output notebook file (default: output.ipynb)')
+    parser.add_argument('--targets', action='store_true',
+                        help="Build the YAML's declared ipynb targets instead of a single -o output")
+    parser.add_argument('-j', '--jobs', type=int, help='Worker processes for target builds (default: CPU count)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only re-render sections whose YAML or files changed, skip writing if nothing did')
+    parser.add_argument('--cache', help='Section cache file for --incremental (default: <output>.cache.json)')
     
     args = parser.parse_args()
     
-    convert_walkthrough_to_notebook(args.yaml_file, args.output)
+    batch = args.targets or len(args.yaml_file) > 1 or any(Path(p).is_dir() for p in args.yaml_file)
+    if batch:
+        if args.output or args.cache:
+            parser.error("-o/--cache only apply to a single walkthrough; targets come from the YAML")
+        try:
+            results = build_all(args.yaml_file, incremental=args.incremental, jobs=args.jobs)
+        except ValueError as e:
+            parser.error(str(e))
+        if any(status.startswith("failed") for _, _, status, _ in results):
+            sys.exit(1)
+        return
+    
+    convert_walkthrough_to_notebook(args.yaml_file[0], args.output or 'output.ipynb',
+                                    incremental=args.incremental, cache_path=args.cache)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()